@@ -1,10 +1,12 @@
 import asyncio
+import hmac
 import json
 import logging
 import os
 import re
+import sys
 import uuid
-from collections.abc import Awaitable
+from collections.abc import Awaitable, Coroutine, Generator, Hashable
 from typing import Any, Callable, Unpack, overload
 from urllib.parse import urlparse
 
@@ -12,8 +14,17 @@ import aiohttp
 from aiohttp import ClientResponse, web
 from aiohttp.client import _RequestContextManager
 
-from .chat import Chat, Sender
+from .chat import Chat, Sender, _LazySender
+from .codec import JsonCodec, detect_codec
+from .dedup import UpdateDedup
+from .offsets import OffsetStore
+from .pools import API_POOL, FILE_POOL, POLL_POOL, ConnectionPools
+from .ratelimit import RateLimiter
 from .reloader import run_with_reloader
+from .retry import NO_RETRY, RETRY_CODES, RETRY_TIMEOUT, RetryPolicy  # noqa: F401
+from .router import CommandRouter, Router
+from .scheduler import UpdateScheduler
+from .webhook import WebhookReply, current_reply
 from .types_ import (
     TG_CallbackQueryOpts,
     TG_CallbackQuerySrc,
@@ -29,6 +40,7 @@ from .types_ import (
     TG_Message,
     TG_MessageResponse,
     TG_PreCheckoutQuerySrc,
+    TG_ReplyMarkupOpts,
     TG_SendMessageOpts,
     TG_SetWebhookOpts,
     TG_Update,
@@ -71,10 +83,32 @@ RegexCheckoutDecorator = Callable[[RegexCheckoutHandler], RegexCheckoutHandler]
 MessageHandler = Callable[["Chat", Any], Any]
 MessageHandlerDecorator = Callable[[MessageHandler], MessageHandler]
 
+# Raw update handlers
+UpdateHandler = Callable[[Any], Any]
+UpdateHandlerDecorator = Callable[[UpdateHandler], UpdateHandler]
+
 API_URL = "https://api.telegram.org"
 API_TIMEOUT = 60
-RETRY_TIMEOUT = 30
-RETRY_CODES = [429, 500, 502, 503, 504]
+JSON_HEADERS = {"Content-Type": "application/json"}
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+# Successful responses start with it, no need to decode them to check
+OK_PREFIX = b'{"ok":true'
+# Extra time given to a getUpdates long poll before it's considered stuck
+WATCHDOG_GRACE = 15
+# Client timeouts: whole request for regular API calls, time to connect
+# and, for file downloads, time between reads
+API_CALL_TIMEOUT = 30
+CONNECT_TIMEOUT = 10
+FILE_READ_TIMEOUT = 60
+# getUpdates errors the polling loop gives up on: bad token, webhook is set
+# or another instance is polling, malformed request
+FATAL_POLLING_CODES = [400, 401, 403, 404, 409]
+# In at-least-once mode, how long polling waits for a handler to finish
+# when a poll brought back only updates that are still being handled
+SETTLE_WAIT = 1.0
+# In at-least-once mode, how long the handler of an update may run before
+# polling moves past the update anyway
+SETTLE_TIMEOUT = 300.0
 
 # Message types to be handled by bot.handle(...)
 MESSAGE_TYPES = [
@@ -88,7 +122,6 @@ MESSAGE_TYPES = [
     "venue",
     "video",
     "game",
-    "delete_chat_photo",
     "new_chat_photo",
     "delete_chat_photo",
     "new_chat_members",
@@ -99,21 +132,166 @@ MESSAGE_TYPES = [
     "successful_payment",
 ]
 
-# Update types for
+# Update types processed as messages
 MESSAGE_UPDATES = [
     "message",
     "edited_message",
     "channel_post",
     "edited_channel_post",
-    "callback_query",
     "chat_member",
     "my_chat_member",
     "chat_join_request",
 ]
 
+# Fields of the update types processed as messages that aren't messages,
+# handle(...) handlers keyed on them receive those updates
+NON_MESSAGE_KEYS = {
+    "chat_member": frozenset(
+        [
+            "chat",
+            "from",
+            "date",
+            "old_chat_member",
+            "new_chat_member",
+            "invite_link",
+            "via_join_request",
+            "via_chat_folder_invite_link",
+        ]
+    ),
+    "chat_join_request": frozenset(
+        ["chat", "from", "user_chat_id", "date", "bio", "invite_link"]
+    ),
+}
+NON_MESSAGE_KEYS["my_chat_member"] = NON_MESSAGE_KEYS["chat_member"]
+
 logger = logging.getLogger("aiotg")
 
 
+# Result of an API call that hasn't finished yet
+_PENDING = object()
+
+
+def _ignore(*args: Any) -> None:
+    pass
+
+
+def _secret_matches(given: str | None, expected: str | None) -> bool:
+    if given is None or expected is None:
+        return given is expected
+    # Constant time, so the response time doesn't leak the secret
+    return hmac.compare_digest(given.encode(), expected.encode())
+
+
+class ApiCall:
+    """
+    Result of :meth:`Bot.api_call`. Awaiting it runs the request right in
+    the awaiting task, a call that isn't awaited by the next loop iteration
+    is started as a task of its own, so fire-and-forget calls still go out.
+
+    Otherwise it behaves like the task :meth:`Bot.api_call` used to return:
+    it can be awaited again for the same result, and the future methods
+    like ``add_done_callback``, ``cancel`` or ``result`` work on it. Asyncio
+    functions taking futures, like ``asyncio.gather``, don't wrap it into a
+    task of their own.
+    """
+
+    __slots__ = ("_coro", "_loop", "_task", "_awaited", "_result", "_exception")
+
+    # Lets asyncio.ensure_future pass the call through as a future
+    _asyncio_future_blocking = False
+
+    _FUTURE_METHODS = frozenset(
+        [
+            "add_done_callback",
+            "remove_done_callback",
+            "cancel",
+            "cancelled",
+            "done",
+            "exception",
+            "result",
+        ]
+    )
+
+    def __init__(self, coro: Coroutine[Any, Any, Any], loop: asyncio.AbstractEventLoop):
+        self._coro: Coroutine[Any, Any, Any] = coro
+        self._loop: asyncio.AbstractEventLoop = loop
+        self._task: asyncio.Future[Any] | None = None
+        self._awaited: bool = False
+        # Outcome of a request run inline, until then _result is _PENDING
+        self._result: Any = _PENDING
+        self._exception: BaseException | None = None
+        loop.call_soon(self._start)
+
+    def __await__(self) -> Generator[Any, None, Any]:
+        if self._task is None and not self._awaited:
+            self._awaited = True
+            return self._run().__await__()
+        return self._ensure_task().__await__()
+
+    def __getattr__(self, name: str) -> Any:
+        if name not in self._FUTURE_METHODS:
+            raise AttributeError(name)
+        return getattr(self._ensure_task(), name)
+
+    def get_loop(self) -> asyncio.AbstractEventLoop:
+        return self._loop
+
+    async def _run(self) -> Any:
+        try:
+            result = await self._coro
+        except BaseException as e:
+            self._result = None
+            self._exception = e
+            if self._task is not None:
+                self._settle(self._task)
+            raise
+        self._result = result
+        if self._task is not None:
+            self._settle(self._task)
+        return result
+
+    def _settle(self, future: "asyncio.Future[Any]") -> None:
+        if future.done():
+            return
+        if isinstance(self._exception, asyncio.CancelledError):
+            future.cancel()
+        elif self._exception is not None:
+            future.set_exception(self._exception)
+        else:
+            future.set_result(self._result)
+
+    def _start(self) -> None:
+        if self._task is not None or self._awaited:
+            return
+        if sys.version_info >= (3, 12):
+            # Run up to the first I/O right away instead of in one more
+            # loop iteration
+            self._task = asyncio.Task(self._coro, loop=self._loop, eager_start=True)
+        else:
+            self._task = self._loop.create_task(self._coro)
+
+    def _take(self) -> Awaitable[Any]:
+        """
+        Hand the request over to the caller to run it, unless it has been
+        started already
+        """
+        if self._task is None and not self._awaited:
+            self._awaited = True
+            return self._run()
+        return self._ensure_task()
+
+    def _ensure_task(self) -> "asyncio.Future[Any]":
+        if self._task is None:
+            if not self._awaited:
+                self._task = self._loop.create_task(self._coro)
+            else:
+                # Running or done inline, the future gets the same outcome
+                self._task = self._loop.create_future()
+                if self._result is not _PENDING:
+                    self._settle(self._task)
+        return self._task
+
+
 class Bot:
     """Telegram bot framework designed for asyncio
 
@@ -122,9 +300,45 @@ class Bot:
     :param str name: Bot name
     :param callable json_serialize: JSON serializer function. (json.dumps by default)
     :param callable json_deserialize: JSON deserializer function. (json.loads by default)
+    :param float webhook_reply_timeout: Return the first call a handler
+        makes in reply to a webhook update in the webhook response, waiting
+        up to this many seconds for it, see :meth:`webhook_handle`
+    :param codec: JSON codec, orjson or msgspec are used when installed
+        unless custom ``json_serialize`` or ``json_deserialize`` are given,
+        see :class:`JsonCodec`
     :param bool default_in_groups: Enables default callback in groups
     :param str proxy: Proxy URL to use for HTTP requests
     :param connector: Custom aiohttp connector
+    :param pools: Separate connection pools for API calls, long polling
+        and file downloads, see :class:`ConnectionPools`. ``connector``
+        takes the place of the API pool if both are set.
+    :param scheduler: Scheduler running update handlers, use
+        ``UpdateScheduler(max_tasks, max_queue)`` to bound concurrency
+        and ``ordered=True`` to handle updates of each chat in order
+    :param rate_limiter: Pace outgoing API calls to stay under Telegram
+        limits, see :class:`RateLimiter`
+    :param retry_policy: Default policy for retrying failed API calls,
+        per method policies can be set in ``bot.retry_policies``
+    :param dedup: Drop updates with an ``update_id`` seen before, see
+        :class:`UpdateDedup`
+    :param offset_store: Keep the polling offset across restarts, see
+        :class:`FileOffsetStore`
+    :param bool at_least_once: Only move the polling offset past updates
+        whose handlers have finished, so that updates being handled when
+        the process dies are polled again after the restart. Updates
+        received again meanwhile are dropped by ``dedup``, which is
+        created if not given. Its backend only stores updates whose
+        handlers have finished. Otherwise the offset moves as soon as
+        updates arrive and those updates are lost. Keep the number of
+        updates in flight under the getUpdates ``limit``, see
+        :class:`UpdateScheduler`, or new updates won't come through.
+        Updates whose handlers are cancelled while the bot is running, or
+        run longer than ``bot.settle_timeout`` seconds, are logged and
+        polling moves past them.
+
+    Client timeouts of API calls and file downloads are set with
+    ``bot.api_call_timeout`` and ``bot.file_timeout``, getUpdates long polls
+    get ``api_timeout`` plus a grace period.
     """
 
     _running: bool = False
@@ -139,43 +353,109 @@ class Bot:
         json_deserialize: Callable[..., Any] = json.loads,
         default_in_groups: bool = False,
         connector: aiohttp.BaseConnector | None = None,
+        scheduler: UpdateScheduler | None = None,
+        rate_limiter: RateLimiter | None = None,
+        retry_policy: RetryPolicy | None = None,
+        pools: ConnectionPools | None = None,
+        codec: JsonCodec | None = None,
+        webhook_reply_timeout: float | None = None,
+        dedup: UpdateDedup | None = None,
+        offset_store: OffsetStore | None = None,
+        at_least_once: bool = False,
     ) -> None:
+        if at_least_once and dedup is None:
+            dedup = UpdateDedup()
         self.api_token: str = api_token
         self.api_timeout: int = api_timeout
         self.name: str | None = name
-        self.json_serialize: Callable[..., str] = json_serialize
-        self.json_deserialize: Callable[..., Any] = json_deserialize
+        if codec is None:
+            if json_serialize is json.dumps and json_deserialize is json.loads:
+                codec = detect_codec()
+            else:
+                codec = JsonCodec(json_serialize, json_deserialize)
+        self.codec: JsonCodec = codec
+        self.json_serialize: Callable[..., str] = codec.dumps
+        self.json_deserialize: Callable[..., Any] = codec.decode
         self.default_in_groups: bool = default_in_groups
         self._session: aiohttp.ClientSession | None = None
         self._cleanups: list[Callable[[], Any]] = []
         self._webhook_uuid: str | None = None
+        self.webhook_reply_timeout: float | None = webhook_reply_timeout
         self._connector: aiohttp.BaseConnector | None = connector
+        self.pools: ConnectionPools | None = pools
+        self._pool_sessions: dict[str, aiohttp.ClientSession] = {}
+        self.scheduler: UpdateScheduler = scheduler or UpdateScheduler()
+        self.rate_limiter: RateLimiter | None = rate_limiter
+        self.retry_policy: RetryPolicy = retry_policy or RetryPolicy()
+        # The polling loop retries getUpdates itself, without giving up
+        self.retry_policies: dict[str, RetryPolicy] = {"getUpdates": NO_RETRY}
+        self.polling_retry_policy: RetryPolicy = RetryPolicy(max_attempts=0)
+        self.dedup: UpdateDedup | None = dedup
+        self.offset_store: OffsetStore | None = offset_store
+        self.at_least_once: bool = at_least_once
+        # Ids of updates with handlers still to finish, in at-least-once
+        # mode, and the loop time after which polling moves past them
+        self._unsettled: dict[int, float] = {}
+        self._settled: asyncio.Event = asyncio.Event()
+        self.settle_timeout: float = SETTLE_TIMEOUT
+        self.api_call_timeout: aiohttp.ClientTimeout = aiohttp.ClientTimeout(
+            total=API_CALL_TIMEOUT, sock_connect=CONNECT_TIMEOUT
+        )
+        self.file_timeout: aiohttp.ClientTimeout = aiohttp.ClientTimeout(
+            sock_connect=CONNECT_TIMEOUT, sock_read=FILE_READ_TIMEOUT
+        )
+        self._online: bool | None = None
+        self._connectivity_hooks: list[Callable[[bool, Exception | None], Any]] = []
+        self._api_error_hooks: list[Callable[[str, Exception], Any]] = []
+
+        # Init default handlers and callbacks, message type handlers
+        # only contain types registered with bot.handle(...)
+        self._handlers: dict[str, MessageHandler] = {}
+        self._commands: CommandRouter = CommandRouter()
+        self._callbacks: Router = Router()
+        self._inlines: Router = Router()
+        self._chosen_inline_result_callbacks: Router = Router()
+        self._checkouts: Router = Router()
+        self._default: DefaultHandler = _ignore
+        self._default_callback: DefaultCallbackHandler = _ignore
+        self._default_inline: DefaultInlineHandler = _ignore
+        self._default_chosen_inline_result_callback: DefaultChosenInlineResultHandler = (
+            _ignore
+        )
+        self._default_checkout: DefaultCheckoutHandler = _ignore
 
-        def no_handle(mt: str) -> MessageHandler:
-            return lambda chat, msg: logger.debug("no handle for %s", mt)
-
-        # Init default handlers and callbacks
-        self._handlers: dict[str, MessageHandler] = {
-            mt: no_handle(mt) for mt in MESSAGE_TYPES
+        # Update type -> processor, see add_update_handler
+        self._update_handlers: dict[str, UpdateHandler] = {
+            ut: self._process_message for ut in MESSAGE_UPDATES
         }
-        self._commands: list[tuple[str, CommandHandler]] = []
-        self._callbacks: list[tuple[str, RegexCallbackHandler]] = []
-        self._inlines: list[tuple[str, RegexInlineHandler]] = []
-        self._chosen_inline_result_callbacks: list[
-            tuple[str, RegexChosenInlineResultHandler]
-        ] = []
-        self._checkouts: list[tuple[str, RegexCheckoutHandler]] = []
-        self._default: DefaultHandler = lambda chat, message: None
-        self._default_callback: DefaultCallbackHandler = lambda chat, cq: None
-        self._default_inline: DefaultInlineHandler = lambda iq: None
-        self._default_chosen_inline_result_callback: DefaultChosenInlineResultHandler = (
-            lambda res: None
+        self._update_handlers.update(
+            inline_query=self._process_inline_query,
+            callback_query=self._process_callback_query,
+            pre_checkout_query=self._process_pre_checkout_query,
+            chosen_inline_result=self._process_chosen_inline_result,
         )
 
-    async def loop(self) -> None:
+    async def loop(
+        self,
+        limit: int | None = None,
+        allowed_updates: list[str] | None = None,
+        pipeline: bool = False,
+    ) -> None:
         """
         Return bot's main loop as coroutine. Use with asyncio.
 
+        :param int limit: Maximum number of updates per getUpdates call
+        :param list allowed_updates: Update types to receive, derived from
+            registered handlers by default (see :meth:`allowed_updates`),
+            pass an empty list to receive Telegram's default set
+        :param bool pipeline: Request the next batch of updates while
+            the current one is being dispatched, has no effect in
+            at-least-once mode
+
+        Network errors, server errors and long polls that hang past
+        ``api_timeout`` are retried with ``polling_retry_policy`` backoff,
+        errors like an invalid token or an active webhook stop the loop.
+
         :Example:
 
         >>> loop = asyncio.get_event_loop()
@@ -186,19 +466,134 @@ class Bot:
         >>> loop = asyncio.get_event_loop()
         >>> loop.create_task(bot.loop())
         """
+        if allowed_updates is None:
+            allowed_updates = self.allowed_updates()
+        params: dict[str, Any] = {
+            "timeout": self.api_timeout,
+            "allowed_updates": allowed_updates,
+        }
+        if limit is not None:
+            params["limit"] = limit
+
+        def get_updates() -> Awaitable[TG_UpdateResponse]:
+            if self._unsettled:
+                self._expire_unsettled()
+            return self.api_call("getUpdates", offset=self._poll_offset() + 1, **params)
+
+        if self.pools is not None and self.pools.warm_up:
+            await self.warm_up(self.pools.warm_up)
+        if self.offset_store is not None:
+            self._offset = max(self._offset, self.offset_store.load())
+        # Updates are received again until their handlers finish
+        pipeline = pipeline and not self.at_least_once
+
         self._running = True
-        while self._running:
-            updates = await self.api_call(
-                "getUpdates", offset=self._offset + 1, timeout=self.api_timeout
-            )
-            self._process_updates(updates)
+        prefetch: Awaitable[TG_UpdateResponse] | None = None
+        failures = 0
+        try:
+            while self._running:
+                try:
+                    updates = await asyncio.wait_for(
+                        prefetch or get_updates(), self.api_timeout + WATCHDOG_GRACE
+                    )
+                except Exception as e:
+                    prefetch = None
+                    failures += 1
+                    delay = (
+                        self.polling_retry_policy.next_delay(
+                            failures, 0.0, getattr(e, "retry_after", None)
+                        )
+                        if self._is_transient(e)
+                        else None
+                    )
+                    if delay is None:
+                        logger.error("getUpdates failed: %r", e)
+                        raise
+                    logger.warning(
+                        "getUpdates failed (%r), retrying in %.1f sec.", e, delay
+                    )
+                    self._set_online(False, e)
+                    await asyncio.sleep(delay)
+                    continue
+
+                prefetch = None
+                failures = 0
+                self._set_online(True)
+
+                if pipeline and not self.scheduler.full():
+                    if updates["ok"] and updates["result"]:
+                        self._offset = max(
+                            self._offset,
+                            max(u["update_id"] for u in updates["result"]),
+                        )
+                    prefetch = get_updates()
+                    # Let the request go out before dispatching the batch
+                    await asyncio.sleep(0)
+
+                dropped = self.dedup.hits if self.dedup is not None else 0
+                self._process_updates(updates)
+                self._checkpoint()
+                if (
+                    self._unsettled
+                    and self.dedup is not None
+                    and self.dedup.hits - dropped == len(updates.get("result", ()))
+                ):
+                    await self._wait_settled()
+                # Don't pull more updates while handlers are backed up
+                await self.scheduler.wait_for_room()
+        finally:
+            if isinstance(prefetch, (asyncio.Future, ApiCall)):
+                prefetch.cancel()
+            self._checkpoint()
+
+    @staticmethod
+    def _is_transient(error: Exception) -> bool:
+        if isinstance(error, BotApiError):
+            return error.response.status not in FATAL_POLLING_CODES
+        return isinstance(error, (aiohttp.ClientError, asyncio.TimeoutError))
+
+    def _set_online(self, online: bool, error: Exception | None = None) -> None:
+        if online == self._online:
+            return
+        self._online = online
+        for hook in self._connectivity_hooks:
+            hook(online, error)
 
-    def run(self, debug: bool = False, reload: bool | None = None) -> None:
+    def on_connectivity(self, hook: Callable[[bool, Exception | None], Any]) -> None:
+        """
+        Set a hook called when polling goes offline or comes back online
+
+        :param hook: callable taking the new state and the error that
+            caused going offline
+
+        :Example:
+
+        >>> bot.on_connectivity(lambda online, error: print(online, error))
+        """
+        self._connectivity_hooks.append(hook)
+
+    def on_api_error(self, hook: Callable[[str, Exception], Any]) -> None:
+        """
+        Set a hook called when a fire-and-forget API call fails, see
+        :meth:`api_call`. Without hooks the errors are logged.
+
+        :param hook: callable taking the API method and the error
+
+        :Example:
+
+        >>> bot.on_api_error(lambda method, error: errors.inc())
+        """
+        self._api_error_hooks.append(hook)
+
+    def run(
+        self, debug: bool = False, reload: bool | None = None, **options: Any
+    ) -> None:
         """
         Convenience method for running bots in getUpdates mode
 
         :param bool debug: Enable debug logging and automatic reloading
         :param bool reload: Automatically reload bot on code change
+        :param options: Polling options passed to :meth:`loop`
         :Example:
 
         >>> if __name__ == '__main__':
@@ -212,7 +607,7 @@ class Bot:
         if reload is None:
             reload = debug
 
-        bot_loop = asyncio.ensure_future(self.loop())
+        bot_loop = asyncio.ensure_future(self.loop(**options))
 
         try:
             if reload:
@@ -231,7 +626,7 @@ class Bot:
         finally:
             for cleanup_action in self._cleanups:
                 cleanup_action()
-            loop.run_until_complete(self.session.close())
+            loop.run_until_complete(self.close())
 
             logger.debug("Closing loop")
             loop.stop()
@@ -258,7 +653,7 @@ class Bot:
             host = os.environ.get("HOST", "0.0.0.0")
             port = int(os.environ.get("PORT", 0)) or url.port
 
-            app.on_cleanup.append(lambda _: self.session.close())
+            app.on_cleanup.append(lambda _: self.close())
             for cleanup_action in self._cleanups:
                 app.on_cleanup.append(
                     lambda app_instance,
@@ -269,7 +664,7 @@ class Bot:
 
             web.run_app(app, host=host, port=port, loop=loop)
         else:
-            loop.run_until_complete(self.session.close())
+            loop.run_until_complete(self.close())
 
     def stop_webhook(self) -> None:
         """
@@ -281,7 +676,7 @@ class Bot:
         """
         Manually register regexp based command
         """
-        self._commands.append((regexp, fn))
+        self._commands.add(regexp, fn)
 
     def command(self, regexp: str) -> CommandDecorator:
         """
@@ -321,7 +716,7 @@ class Bot:
         """
         Manually register regexp based callback
         """
-        self._inlines.append((regexp, fn))
+        self._inlines.add(regexp, fn)
 
     @overload
     def inline(self, callback: DefaultInlineHandler) -> DefaultInlineHandler: ...
@@ -368,7 +763,7 @@ class Bot:
         """
         Manually register regexp based callback for the ``chosen_inline_result`` updates
         """
-        self._chosen_inline_result_callbacks.append((regexp, fn))
+        self._chosen_inline_result_callbacks.add(regexp, fn)
 
     @overload
     def chosen_inline_result_callback(
@@ -415,7 +810,7 @@ class Bot:
         """
         Manually register regexp based callback
         """
-        self._callbacks.append((regexp, fn))
+        self._callbacks.add(regexp, fn)
 
     @overload
     def callback(self, callback: DefaultCallbackHandler) -> DefaultCallbackHandler: ...
@@ -456,7 +851,7 @@ class Bot:
         """
         Manually register regexp based checkout handler
         """
-        self._checkouts.append((regexp, fn))
+        self._checkouts.add(regexp, fn)
 
     @overload
     def checkout(self, callback: DefaultCheckoutHandler) -> DefaultCheckoutHandler: ...
@@ -468,7 +863,7 @@ class Bot:
         self, callback: DefaultCheckoutHandler | str
     ) -> DefaultCheckoutHandler | RegexCheckoutDecorator:
         if callable(callback):
-            self._default_checkout: DefaultCheckoutHandler = callback
+            self._default_checkout = callback
             return callback
         elif isinstance(callback, str):
 
@@ -493,10 +888,82 @@ class Bot:
 
         def wrap(callback: MessageHandler) -> MessageHandler:
             self._handlers[msg_type] = callback
+            # Messages may carry several types (venue comes with location),
+            # keep MESSAGE_TYPES order to decide which handler wins
+            self._handlers = dict(
+                sorted(
+                    self._handlers.items(),
+                    key=lambda item: (
+                        MESSAGE_TYPES.index(item[0])
+                        if item[0] in MESSAGE_TYPES
+                        else len(MESSAGE_TYPES)
+                    ),
+                )
+            )
+            return callback
+
+        return wrap
+
+    def add_update_handler(self, update_type: str, fn: UpdateHandler) -> None:
+        """
+        Manually register handler for a raw update type
+        """
+        self._update_handlers[update_type] = fn
+
+    def update_handler(self, update_type: str) -> UpdateHandlerDecorator:
+        """
+        Set handler for update types without a dedicated decorator.
+        The handler is called with the update payload and replaces
+        the built-in processing if the type is already handled.
+
+        :Example:
+
+        >>> @bot.update_handler("poll_answer")
+        >>> def handle(answer):
+        >>>     votes[answer["poll_id"]].append(answer["option_ids"])
+        """
+
+        def wrap(callback: UpdateHandler) -> UpdateHandler:
+            self.add_update_handler(update_type, callback)
             return callback
 
         return wrap
 
+    def allowed_updates(self) -> list[str]:
+        """
+        Update types the registered handlers can process, used as
+        ``allowed_updates`` for polling and webhooks unless set explicitly
+        """
+        builtin = {
+            "inline_query": self._inlines or self._default_inline is not _ignore,
+            "callback_query": self._callbacks or self._default_callback is not _ignore,
+            "pre_checkout_query": self._checkouts
+            or self._default_checkout is not _ignore,
+            "chosen_inline_result": self._chosen_inline_result_callbacks
+            or self._default_chosen_inline_result_callback is not _ignore,
+        }
+        handles_messages = bool(
+            self._commands or self._handlers or self._default is not _ignore
+        )
+
+        allowed = []
+        for ut, handler in self._update_handlers.items():
+            if ut in builtin:
+                needed = handler != getattr(self, "_process_" + ut) or builtin[ut]
+            elif handler == self._process_message:
+                keys = NON_MESSAGE_KEYS.get(ut)
+                if keys is None:
+                    needed = handles_messages
+                else:
+                    # Chat member updates and join requests have no text,
+                    # only handlers keyed on one of their fields see them
+                    needed = not keys.isdisjoint(self._handlers)
+            else:
+                needed = True
+            if needed:
+                allowed.append(ut)
+        return allowed
+
     def channel(self, channel_name: str) -> Chat:
         """
         Construct a Chat object used to post to channel
@@ -521,45 +988,172 @@ class Bot:
         """
         return Chat(self, group_id, "group")
 
-    def api_call(self, method: str, **params: Any) -> Awaitable[Any]:
+    def api_call(
+        self,
+        method: str,
+        deadline: float | None = None,
+        fire_and_forget: bool = False,
+        **params: Any,
+    ) -> Awaitable[Any]:
         """
         Call Telegram API.
 
         See https://core.telegram.org/bots/api for reference.
 
         :param str method: Telegram API method
+        :param float deadline: Time limit for the call in seconds, including
+            rate limiter queueing and retries. ``asyncio.TimeoutError`` is
+            raised when it runs out.
+        :param bool fire_and_forget: Only check that the call succeeded
+            without decoding the result, the call resolves to ``None`` and
+            errors go to :meth:`on_api_error` hooks instead of being raised.
+            Chat helpers passing options through to the call accept it too.
         :param params: Arguments for the method call
         """
-        coro = self._api_call(method, **params)
-        # Explicitly ensure that API call is executed
-        return asyncio.ensure_future(coro)
+        reply = current_reply.get()
+        if reply is not None and reply.claim(method, params):
+            # Sent with the webhook response, there is no result to return
+            done: asyncio.Future[Any] = asyncio.get_running_loop().create_future()
+            done.set_result(None)
+            return done
 
-    async def _api_call(self, method: str, **params: Any) -> Any:
+        if fire_and_forget:
+            coro = self._fire_and_forget(method, deadline, params)
+        else:
+            coro = self._api_call(method, deadline, **params)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Called before the loop runs, e.g. run_until_complete(bot.set_webhook())
+            return asyncio.ensure_future(coro)
+        # The call is executed whether it's awaited or not
+        return ApiCall(coro, loop)
+
+    async def _fire_and_forget(
+        self, method: str, deadline: float | None, params: dict[str, Any]
+    ) -> None:
+        try:
+            await self._api_call(method, deadline, False, **params)
+        except Exception as e:
+            if not self._api_error_hooks:
+                logger.error("%s failed: %r", method, e)
+            for hook in self._api_error_hooks:
+                try:
+                    hook(method, e)
+                except Exception:
+                    logger.exception("API error hook failed")
+
+    async def _api_call(
+        self,
+        method: str,
+        deadline: float | None = None,
+        decode: bool = True,
+        **params: Any,
+    ) -> Any:
         url = "{0}/bot{1}/{2}".format(API_URL, self.api_token, method)
         logger.debug("api_call %s, %s", method, params)
 
-        # response = await self.session.post(url, data=params)
-        response = await self.session.post(url, json=params)
-
-        if response.status == 200:
-            return await response.json(loads=self.json_deserialize)
-        elif response.status in RETRY_CODES:
-            logger.info(
-                "Server returned %d, retrying in %d sec.",
-                response.status,
-                RETRY_TIMEOUT,
+        policy = self.retry_policies.get(method, self.retry_policy)
+        timeout = self._client_timeout(method, params)
+        session = self._pool_session(POLL_POOL if method == "getUpdates" else API_POOL)
+        started = asyncio.get_running_loop().time()
+        expires = None if deadline is None else started + deadline
+        attempt = 0
+
+        async with asyncio.timeout_at(expires):
+            while True:
+                attempt += 1
+                if self.rate_limiter is not None:
+                    await self.rate_limiter.acquire(method, params.get("chat_id"))
+
+                try:
+                    response = await session.post(
+                        url,
+                        data=self.codec.encode(params),
+                        headers=JSON_HEADERS,
+                        timeout=timeout,
+                    )
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    if not policy.retries_error(method, e):
+                        raise
+                    delay = self._next_delay(policy, attempt, started, expires)
+                    if delay is None:
+                        raise
+                    logger.info(
+                        "%s failed (%r), retrying in %.1f sec.", method, e, delay
+                    )
+                    await asyncio.sleep(delay)
+                    continue
+
+                if response.status == 200:
+                    body = await response.read()
+                    if not decode and (
+                        body.startswith(OK_PREFIX) or self.codec.decode(body)["ok"]
+                    ):
+                        return None
+                    if method == "getUpdates":
+                        return self.codec.decode_updates(body)
+                    return self.codec.decode(body)
+
+                retry_after = await self._retry_after(response)
+                if response.status in policy.retry_codes:
+                    delay = self._next_delay(
+                        policy, attempt, started, expires, retry_after
+                    )
+                    if delay is not None:
+                        logger.info(
+                            "Server returned %d, retrying in %.1f sec.",
+                            response.status,
+                            delay,
+                        )
+                        await response.release()
+                        await asyncio.sleep(delay)
+                        continue
+
+                if response.headers["content-type"] == "application/json":
+                    json_resp = self.codec.decode(await response.read())
+                    err_msg = json_resp["description"]
+                else:
+                    err_msg = await response.read()
+                logger.error(err_msg)
+                raise BotApiError(err_msg, response=response, retry_after=retry_after)
+
+    def _client_timeout(
+        self, method: str, params: dict[str, Any]
+    ) -> aiohttp.ClientTimeout:
+        if method == "getUpdates":
+            # Long poll, the server holds the request for up to "timeout"
+            return aiohttp.ClientTimeout(
+                total=params.get("timeout", 0) + WATCHDOG_GRACE,
+                sock_connect=CONNECT_TIMEOUT,
             )
-            await response.release()
-            await asyncio.sleep(RETRY_TIMEOUT)
-            return await self.api_call(method, **params)
-        else:
-            if response.headers["content-type"] == "application/json":
-                json_resp = await response.json(loads=self.json_deserialize)
-                err_msg = json_resp["description"]
-            else:
-                err_msg = await response.read()
-            logger.error(err_msg)
-            raise BotApiError(err_msg, response=response)
+        return self.api_call_timeout
+
+    @staticmethod
+    def _next_delay(
+        policy: RetryPolicy,
+        attempt: int,
+        started: float,
+        expires: float | None,
+        retry_after: float | None = None,
+    ) -> float | None:
+        now = asyncio.get_running_loop().time()
+        delay = policy.next_delay(attempt, now - started, retry_after)
+        # Don't sleep into the deadline, fail with the actual error instead
+        if delay is not None and expires is not None and now + delay >= expires:
+            return None
+        return delay
+
+    async def _retry_after(self, response: ClientResponse) -> float | None:
+        if response.status != 429:
+            return None
+        if response.headers.get("content-type") == "application/json":
+            json_resp = self.codec.decode(await response.read())
+            retry_after = json_resp.get("parameters", {}).get("retry_after")
+            if retry_after is not None:
+                return retry_after
+        header = response.headers.get("retry-after")
+        return float(header) if header and header.isdigit() else None
 
     async def get_me(self) -> TG_User:
         """
@@ -582,17 +1176,29 @@ class Bot:
         return json_result["result"]
 
     def send_message(
-        self, chat_id: int | str, text: str, **options: Unpack[TG_SendMessageOpts]
+        self,
+        chat_id: int | str,
+        text: str,
+        fire_and_forget: bool = False,
+        **options: Unpack[TG_SendMessageOpts],
     ) -> Awaitable[TG_MessageResponse]:
         """
         Send a text message to chat
 
         :param int chat_id: ID of the chat to send the message to
         :param str text: Text to send
+        :param bool fire_and_forget: Don't wait for the sent message,
+            see :meth:`api_call`
         :param options: Additional sendMessage options
             (see https://core.telegram.org/bots/api#sendmessage)
         """
-        return self.api_call("sendMessage", chat_id=chat_id, text=text, **options)
+        return self.api_call(
+            "sendMessage",
+            chat_id=chat_id,
+            text=text,
+            fire_and_forget=fire_and_forget,
+            **options,
+        )
 
     def edit_message_text(
         self,
@@ -621,7 +1227,7 @@ class Bot:
         self,
         chat_id: int | str,
         message_id: int,
-        reply_markup: str,
+        reply_markup: TG_ReplyMarkupOpts | str,
         **options: Unpack[TG_EditMessageReplyMarkupOpts],
     ) -> Awaitable[Any]:
         """
@@ -629,7 +1235,7 @@ class Bot:
 
         :param int chat_id: ID of the chat the message to edit is in
         :param int message_id: ID of the message to edit
-        :param str reply_markup: New inline keyboard markup for the message
+        :param dict reply_markup: New inline keyboard markup for the message
         :param options: Additional API options
         """
         return self.api_call(
@@ -658,7 +1264,9 @@ class Bot:
         """
         headers: dict[str, Any] | None = {"range": range} if range else None
         url = "{0}/file/bot{1}/{2}".format(API_URL, self.api_token, file_path)
-        return self.session.get(url, headers=headers)
+        return self._pool_session(FILE_POOL).get(
+            url, headers=headers, timeout=self.file_timeout
+        )
 
     def get_user_profile_photos(
         self, user_id: int, **options: Unpack[TG_GetUserProfilePhotosOpts]
@@ -688,15 +1296,40 @@ class Bot:
         >>> from aiohttp import web
         >>> app = web.Application()
         >>> app.router.add_route('/webhook')
+
+        With ``webhook_reply_timeout`` set, the response waits that long
+        for the handler's first call sending, editing or answering something
+        in the update's chat and carries it to Telegram instead of a
+        separate request. That call resolves to ``None`` right away and
+        skips the rate limiter, later calls are made as usual. Handlers
+        sending several messages in a row may see the first one arrive
+        after the next.
         """
 
-        if request.headers.get("X-Telegram-Bot-Api-Secret-Token") != self._webhook_uuid:
+        if not _secret_matches(request.headers.get(SECRET_HEADER), self._webhook_uuid):
             logger.warning(f"Probably, a malicious request! Request: {request}")
             return web.Response(status=403)
 
-        update = await request.json(loads=self.json_deserialize)
-        self._process_update(update)
-        return web.Response()
+        # Hold the response while handlers are backed up, so that Telegram
+        # slows down delivery instead of us queueing without limit
+        await self.scheduler.wait_for_room()
+        update = self.codec.decode_update(await request.read())
+        if self.webhook_reply_timeout is None:
+            self._process_update(update)
+            return web.Response()
+
+        reply = WebhookReply()
+        token = current_reply.set(reply)
+        try:
+            self._process_update(update)
+        finally:
+            current_reply.reset(token)
+        call = await reply.wait(self.webhook_reply_timeout)
+        if call is None:
+            return web.Response()
+        return web.Response(
+            body=self.codec.encode(call), content_type="application/json"
+        )
 
     def create_webhook_app(
         self, path: str, loop: asyncio.AbstractEventLoop | None = None
@@ -706,6 +1339,9 @@ class Bot:
         """
         app = web.Application(loop=loop)
         app.router.add_route("POST", path, self.webhook_handle)
+        if self.pools is not None and self.pools.warm_up:
+            warm_up = self.pools.warm_up
+            app.on_startup.append(lambda _: self.warm_up(warm_up))
         return app
 
     def set_webhook(
@@ -715,10 +1351,13 @@ class Bot:
         Register you webhook url for Telegram service.
 
         A newly generated UUID will be used as a secret_token parameter
-        if it's not specified explicitly
+        if it's not specified explicitly, allowed_updates defaults to the
+        update types registered handlers can process
         """
         if "secret_token" not in options:
             options["secret_token"] = str(uuid.uuid4())
+        if "allowed_updates" not in options:
+            options["allowed_updates"] = self.allowed_updates()
         self._webhook_uuid = options["secret_token"]
         return self.api_call("setWebhook", url=webhook_url, **options)
 
@@ -743,11 +1382,71 @@ class Bot:
     @property
     def session(self) -> aiohttp.ClientSession:
         if not self._session or self._session.closed:
-            self._session = aiohttp.ClientSession(
-                json_serialize=self.json_serialize, connector=self._connector
-            )
+            connector = self._connector
+            if connector is None and self.pools is not None:
+                connector = self.pools.connector(API_POOL)
+            self._session = self._new_session(connector)
         return self._session
 
+    def _new_session(
+        self, connector: aiohttp.BaseConnector | None, connector_owner: bool = True
+    ) -> aiohttp.ClientSession:
+        return aiohttp.ClientSession(
+            json_serialize=self.json_serialize,
+            connector=connector,
+            connector_owner=connector_owner,
+            timeout=self.api_call_timeout,
+        )
+
+    def _pool_session(self, pool: str) -> aiohttp.ClientSession:
+        if pool == API_POOL:
+            return self.session
+        session = self._pool_sessions.get(pool)
+        if session is not None and not session.closed:
+            return session
+        if self.pools is None:
+            return self.session
+        session = self._new_session(self.pools.connector(pool))
+        self._pool_sessions[pool] = session
+        return session
+
+    async def warm_up(self, connections: int = 1) -> None:
+        """
+        Open connections to the Bot API ahead of the first update, in every
+        pool if :class:`ConnectionPools` are used
+
+        :param int connections: Number of connections to open per pool
+        """
+        pools = [API_POOL, POLL_POOL, FILE_POOL] if self.pools else [API_POOL]
+        sessions = [self._pool_session(pool) for pool in pools]
+
+        async def connect(session: aiohttp.ClientSession) -> None:
+            try:
+                async with session.head(API_URL, allow_redirects=False):
+                    pass
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.warning("Connection warm-up failed: %r", e)
+
+        await asyncio.gather(
+            *(connect(session) for session in sessions for _ in range(connections))
+        )
+
+    async def close(self) -> None:
+        """
+        Close HTTP sessions of the bot, the dedup backend and flush the
+        offset store
+        """
+        sessions = [self._session, *self._pool_sessions.values()]
+        self._pool_sessions = {}
+        for session in sessions:
+            if session is not None and not session.closed:
+                await session.close()
+        if self.dedup is not None and self.dedup.backend is not None:
+            self.dedup.backend.close()
+        if self.offset_store is not None:
+            self._checkpoint()
+            self.offset_store.flush()
+
     def _process_message(self, message: TG_Message):
         chat = Chat.from_message(self, message)
 
@@ -759,11 +1458,11 @@ class Bot:
         if "text" not in message:
             return
 
-        for patterns, handler in self._commands:
-            m = re.search(patterns, message["text"], re.I)
-            if m:
-                self.track(message, handler.__name__)
-                return handler(chat, m)
+        found = self._commands.match(message["text"])
+        if found:
+            handler, m = found
+            self.track(message, handler.__name__)
+            return handler(chat, m)
 
         # No match, run default if it's a 1to1 chat
         # However, if default_in_groups option is active, run default in any chat (not only 1to1)
@@ -774,27 +1473,27 @@ class Bot:
     def _process_inline_query(self, query: TG_InlineQuerySrc) -> Any:
         iq = InlineQuery(self, query)
 
-        for patterns, handler in self._inlines:
-            match = re.search(patterns, query["query"], re.I)
-            if match:
-                return handler(iq, match)
+        found = self._inlines.match(query["query"])
+        if found:
+            handler, match = found
+            return handler(iq, match)
         return self._default_inline(iq)
 
     def _process_chosen_inline_result(self, result: TG_ChosenInlineResultSrc) -> Any:
         cir = ChosenInlineResult(self, result)
-        for patterns, handler in self._chosen_inline_result_callbacks:
-            match = re.search(patterns, result["query"], re.I)
-            if match:
-                return handler(cir, match)
+        found = self._chosen_inline_result_callbacks.match(result["query"])
+        if found:
+            handler, match = found
+            return handler(cir, match)
         return self._default_chosen_inline_result_callback(cir)
 
     def _process_callback_query(self, query: TG_CallbackQuerySrc) -> Any:
         chat = Chat.from_message(self, query["message"]) if "message" in query else None
         cq = CallbackQuery(self, query)
-        for patterns, handler in self._callbacks:
-            match = re.search(patterns, cq.data, re.I)
-            if match:
-                return handler(chat, cq, match)
+        found = self._callbacks.match(cq.data)
+        if found:
+            handler, match = found
+            return handler(chat, cq, match)
 
         if chat and not chat.is_group() or self.default_in_groups:
             return self._default_callback(chat, cq)
@@ -802,10 +1501,10 @@ class Bot:
     def _process_pre_checkout_query(self, query: TG_PreCheckoutQuerySrc) -> Any:
         pcq = PreCheckoutQuery(self, query)
 
-        for patterns, handler in self._checkouts:
-            match = re.search(patterns, pcq.invoice_payload, re.I)
-            if match:
-                return handler(pcq, match)
+        found = self._checkouts.match(pcq.invoice_payload)
+        if found:
+            handler, match = found
+            return handler(pcq, match)
         return self._default_checkout(pcq)
 
     def _process_updates(self, updates: TG_UpdateResponse) -> None:
@@ -822,29 +1521,121 @@ class Bot:
         # Update offset
         self._offset = max(self._offset, update["update_id"])
 
+        reply = current_reply.get()
+        # In at-least-once mode ids are persisted once handlers finish, so
+        # that updates lost in a crash aren't dropped when they come again
+        if self.dedup is not None and self.dedup.seen(
+            update["update_id"], persist=not self.at_least_once
+        ):
+            logger.debug("duplicate update %s", update["update_id"])
+            if reply is not None:
+                reply.close()
+            return
+
         coro = None
 
-        # Determine update type starting with message updates
-        for ut in MESSAGE_UPDATES:
-            if ut in update:
-                coro = self._process_message(update[ut])
+        # Determine update type by its payload key
+        handlers = self._update_handlers
+        for ut in update:
+            handler = handlers.get(ut)
+            if handler is not None:
+                payload = update[ut]
+                if reply is not None:
+                    reply.chat_id = self._update_lane(payload)
+                coro = handler(payload)
+                if isinstance(coro, ApiCall):
+                    # A reply returned by the handler runs in the handler's
+                    # scheduler slot and lane rather than on its own
+                    coro = coro._take()
                 break
         else:
-            if "inline_query" in update:
-                coro = self._process_inline_query(update["inline_query"])
-            elif "callback_query" in update:
-                coro = self._process_callback_query(update["callback_query"])
-            elif "pre_checkout_query" in update:
-                coro = self._process_pre_checkout_query(update["pre_checkout_query"])
-            elif "chosen_inline_result" in update:
-                coro = self._process_chosen_inline_result(
-                    update["chosen_inline_result"]
-                )
+            logger.error("don't know how to handle update: %s", update)
+
+        if reply is not None:
+            if coro:
+                coro = reply.watch(coro)
             else:
-                logger.error("don't know how to handle update: %s", update)
+                reply.close()
 
         if coro:
-            asyncio.ensure_future(coro)
+            if self.at_least_once:
+                self._unsettled[update["update_id"]] = (
+                    asyncio.get_running_loop().time() + self.settle_timeout
+                )
+                coro = self._settle(update["update_id"], coro)
+            lane = self._scheduler_lane(payload) if self.scheduler.ordered else None
+            self.scheduler.submit(coro, lane)
+
+    async def _settle(self, update_id: int, aw: Awaitable[Any]) -> Any:
+        cancelled = False
+        try:
+            return await aw
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+        finally:
+            if not cancelled:
+                self._unsettled.pop(update_id, None)
+                self._settled.set()
+                if self.dedup is not None:
+                    self.dedup.persist(update_id)
+            elif self._running:
+                # Polling would otherwise stay before it for good. Handlers
+                # cancelled by a shutdown leave their updates unsettled, so
+                # that a restart polls them again
+                logger.warning("Handler of update %s was cancelled", update_id)
+                self._unsettled.pop(update_id, None)
+                self._settled.set()
+
+    async def _wait_settled(self) -> None:
+        self._settled.clear()
+        try:
+            await asyncio.wait_for(self._settled.wait(), SETTLE_WAIT)
+        except asyncio.TimeoutError:
+            pass
+
+    def _expire_unsettled(self) -> None:
+        now = asyncio.get_running_loop().time()
+        expired = [i for i, deadline in self._unsettled.items() if deadline <= now]
+        for update_id in expired:
+            logger.warning(
+                "Update %s is still being handled after %.0f sec., moving on",
+                update_id,
+                self.settle_timeout,
+            )
+            del self._unsettled[update_id]
+
+    def _poll_offset(self) -> int:
+        """
+        Id of the last update the bot is done with: the last one received,
+        or in at-least-once mode the last one before the oldest update
+        still being handled
+        """
+        if self._unsettled:
+            return min(self._unsettled) - 1
+        return self._offset
+
+    def _checkpoint(self) -> None:
+        if self.offset_store is not None:
+            self.offset_store.save(self._poll_offset())
+
+    def _scheduler_lane(self, payload: Any) -> Hashable | None:
+        return self._update_lane(payload)
+
+    @staticmethod
+    def _update_lane(payload: Any) -> int | str | None:
+        """
+        Key of the serial lane for an update payload: the chat it belongs to,
+        or the sender for updates without a chat (inline queries and such)
+        """
+        if "chat" in payload:
+            return payload["chat"]["id"]
+        message = payload.get("message")
+        if message and "chat" in message:
+            return message["chat"]["id"]
+        if "from" in payload:
+            return payload["from"]["id"]
+        return None
 
 
 class TgBot(Bot):
@@ -859,21 +1650,28 @@ class InlineQuery:
     See https://core.telegram.org/bots/api#inline-mode for details
     """
 
+    __slots__ = ("bot", "query_id", "query", "_from", "_sender")
+
+    sender = _LazySender()
+
     def __init__(self, bot: "Bot", src: TG_InlineQuerySrc):
         self.bot: "Bot" = bot
-        self.sender: Sender = Sender(src["from"])
+        self._from: Any = src["from"]
+        self._sender: Sender | None = None
         self.query_id: str = src["id"]
         self.query: str = src["query"]
 
     def answer(
         self,
-        results: list[TG_InlineQueryResult],
+        results: list[TG_InlineQueryResult] | str,
         **options: Unpack[TG_InlineQueryAnswerOpts],
     ):
+        # Results are encoded along with the request body, a JSON string
+        # from older code is passed through as is
         return self.bot.api_call(
             "answerInlineQuery",
             inline_query_id=self.query_id,
-            results=self.bot.json_serialize(results),
+            results=results,
             **options,
         )
 
@@ -885,9 +1683,22 @@ class TgInlineQuery(InlineQuery):
 
 
 class ChosenInlineResult:
+    __slots__ = (
+        "bot",
+        "result_id",
+        "location",
+        "inline_message_id",
+        "query",
+        "_from",
+        "_sender",
+    )
+
+    sender = _LazySender()
+
     def __init__(self, bot: "Bot", src: TG_ChosenInlineResultSrc) -> None:
         self.bot: "Bot" = bot
-        self.sender: "Sender" = Sender(src["from"])
+        self._from: Any = src["from"]
+        self._sender: Sender | None = None
         self.result_id: str = src["result_id"]
         self.location: TG_Location | None = src.get("location")
         self.inline_message_id: str | None = src.get("inline_message_id")
@@ -895,22 +1706,42 @@ class ChosenInlineResult:
 
 
 class CallbackQuery:
+    __slots__ = ("bot", "query_id", "data", "src")
+
     def __init__(self, bot: "Bot", src: TG_CallbackQuerySrc) -> None:
         self.bot: "Bot" = bot
         self.query_id: str = src["id"]
         self.data: str = src.get("data", "")
         self.src: TG_CallbackQuerySrc = src
 
-    def answer(self, **options: Unpack[TG_CallbackQueryOpts]):
+    def answer(
+        self, fire_and_forget: bool = False, **options: Unpack[TG_CallbackQueryOpts]
+    ):
         return self.bot.api_call(
-            "answerCallbackQuery", callback_query_id=self.query_id, **options
+            "answerCallbackQuery",
+            callback_query_id=self.query_id,
+            fire_and_forget=fire_and_forget,
+            **options,
         )
 
 
 class PreCheckoutQuery:
+    __slots__ = (
+        "bot",
+        "query_id",
+        "currency",
+        "total_amount",
+        "invoice_payload",
+        "_from",
+        "_sender",
+    )
+
+    sender = _LazySender()
+
     def __init__(self, bot: "Bot", src: TG_PreCheckoutQuerySrc) -> None:
         self.bot: "Bot" = bot
-        self.sender: Sender = Sender(src["from"])
+        self._from: Any = src["from"]
+        self._sender: Sender | None = None
         self.query_id: str = src["id"]
         self.currency: str = src["currency"]
         self.total_amount: int = src["total_amount"]
@@ -926,6 +1757,12 @@ class PreCheckoutQuery:
 
 
 class BotApiError(RuntimeError):
-    def __init__(self, *args: object, response: aiohttp.ClientResponse) -> None:
+    def __init__(
+        self,
+        *args: object,
+        response: aiohttp.ClientResponse,
+        retry_after: float | None = None,
+    ) -> None:
         super().__init__(*args)
         self.response: ClientResponse = response
+        self.retry_after: float | None = retry_after
@@ -1,6 +1,6 @@
 import logging
 from collections.abc import Awaitable
-from typing import TYPE_CHECKING, Any, Literal, Unpack, override
+from typing import TYPE_CHECKING, Any, Literal, Unpack, overload, override
 
 from .types_ import (
     TG_BoolResponse,
@@ -33,29 +33,66 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger("aiotg")
 
+_NO_SENDER = {"first_name": "N/A"}
+
+
+class _LazySender:
+    """
+    ``sender`` attribute of update wrappers, the :class:`Sender` is only
+    built from the ``_from`` slot when a handler uses it
+    """
+
+    @overload
+    def __get__(self, obj: None, objtype: Any = None) -> "_LazySender": ...
+
+    @overload
+    def __get__(self, obj: Any, objtype: Any = None) -> "Sender": ...
+
+    def __get__(self, obj: Any, objtype: Any = None) -> "Sender | _LazySender":
+        if obj is None:
+            return self
+        if obj._sender is None:
+            obj._sender = Sender(obj._from)
+        return obj._sender
+
+    def __set__(self, obj: Any, value: "Sender") -> None:
+        obj._sender = value
+
 
 class Chat:
     """
     Wrapper for telegram chats, passed to most callbacks
     """
 
+    __slots__ = ("bot", "message", "id", "type", "_from", "_sender")
+
+    sender = _LazySender()
+
     def send_text(
-        self, text: str, **options: Unpack[TG_SendMessageOpts]
+        self,
+        text: str,
+        fire_and_forget: bool = False,
+        **options: Unpack[TG_SendMessageOpts],
     ) -> Awaitable[TG_MessageResponse]:
         """
         Send a text message to the chat.
 
         :param str text: Text of the message to send
+        :param bool fire_and_forget: Don't wait for the sent message,
+            errors go to ``bot.on_api_error`` hooks
         :param options: Additional sendMessage options (see
             https://core.telegram.org/bots/api#sendmessage
         """
-        return self.bot.send_message(self.id, text, **options)
+        return self.bot.send_message(
+            self.id, text, fire_and_forget=fire_and_forget, **options
+        )
 
     def reply(
         self,
         text: str,
         markup: TG_ReplyMarkupOpts | None = None,
         parse_mode: Literal["Markdown", "HTML"] | None = None,
+        fire_and_forget: bool = False,
     ) -> Awaitable[TG_MessageResponse]:
         """
         Reply to the message this `Chat` object is based on.
@@ -64,6 +101,7 @@ class Chat:
         :param dict markup: Markup options
         :param str parse_mode: Text parsing mode (``"Markdown"``, ``"HTML"`` or
             ``None``)
+        :param bool fire_and_forget: Don't wait for the sent message
         """
         # if markup is None:
         #     markup = {}
@@ -80,7 +118,7 @@ class Chat:
         if markup is not None:
             opts["reply_markup"] = markup
 
-        return self.send_text(text, **opts)
+        return self.send_text(text, fire_and_forget, **opts)
 
     def edit_text(
         self,
@@ -116,7 +154,7 @@ class Chat:
         :param dict markup: Markup options
         """
         return self.bot.edit_message_reply_markup(
-            self.id, message_id, reply_markup=self.bot.json_serialize(markup)
+            self.id, message_id, reply_markup=markup
         )
 
     def get_chat(self) -> Awaitable[TG_GetChatResponse]:
@@ -373,7 +411,7 @@ class Chat:
 
     def send_media_group(
         self,
-        media: str,
+        media: list[dict[str, Any]] | str,
         disable_notification: bool = False,
         reply_to_message_id: int | None = None,
         **options: Unpack[TG_SendMediaGroupOpts],
@@ -381,8 +419,8 @@ class Chat:
         """
         Send a group of photos or videos as an album
 
-        :param media: A JSON-serialized array describing photos and videos
-        to be sent, must include 2–10 items
+        :param media: An array describing photos and videos to be sent,
+        must include 2–10 items. A JSON-serialized array works as well.
         :param disable_notification: Sends the messages silently. Users will
         receive a notification with no sound.
         :param reply_to_message_id: If the messages are a reply, ID of the original message
@@ -390,7 +428,6 @@ class Chat:
         https://core.telegram.org/bots/api#sendmediagroup)
 
         :Example:
-        >>> from json import dumps
         >>> photos_urls = [
         >>>     "https://telegram.org/img/t_logo.png",
         >>>     "https://telegram.org/img/SiteAndroid.jpg?1",
@@ -405,7 +442,7 @@ class Chat:
         >>>     'media': p,
         >>>     'caption': f'{i} of {count}'
         >>> }
-        >>> await chat.send_media_group(dumps(tg_album))
+        >>> await chat.send_media_group(tg_album)
         """
 
         return self.bot.api_call(
@@ -479,10 +516,10 @@ class Chat:
         self.bot: Bot = bot
         self.message: TG_MaybeInaccessibleMessage | None = src_message
         if src_message and "from" in src_message:
-            sender = src_message["from"]
+            self._from: Any = src_message["from"]
         else:
-            sender = {"first_name": "N/A"}
-        self.sender: "Sender" = Sender(sender)
+            self._from = _NO_SENDER
+        self._sender: Sender | None = None
         self.id: int | str = chat_id
         self.type: Literal["private", "group", "supergroup", "channel"] = chat_type
 
@@ -508,6 +545,8 @@ class TgChat(Chat):
 class Sender(dict[str, Any]):
     """A small wrapper for sender info, mostly used for logging"""
 
+    __slots__ = ()
+
     @override
     def __repr__(self) -> str:
         uname = " (%s)" % self["username"] if "username" in self else ""
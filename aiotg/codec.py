@@ -0,0 +1,101 @@
+import json
+from typing import Any, Callable
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+class JsonCodec:
+    """
+    JSON codec used for API calls and webhook updates. Request bodies are
+    encoded straight to bytes and responses are parsed from the raw body,
+    :meth:`dumps` is for the fields Telegram expects as JSON strings.
+
+    The base codec wraps ``json.dumps`` and ``json.loads`` or functions
+    with the same signature.
+    """
+
+    name: str = "json"
+
+    def __init__(
+        self,
+        dumps: Callable[..., str] = json.dumps,
+        loads: Callable[..., Any] = json.loads,
+    ) -> None:
+        self._dumps: Callable[..., str] = dumps
+        self._loads: Callable[..., Any] = loads
+
+    def dumps(self, obj: Any) -> str:
+        return self._dumps(obj)
+
+    def encode(self, obj: Any) -> bytes:
+        return self._dumps(obj).encode()
+
+    def decode(self, data: bytes | str) -> Any:
+        return self._loads(data)
+
+    def decode_update(self, data: bytes | str) -> Any:
+        """Decode a webhook update"""
+        return self.decode(data)
+
+    def decode_updates(self, data: bytes | str) -> Any:
+        """Decode a getUpdates response"""
+        return self.decode(data)
+
+
+class OrjsonCodec(JsonCodec):
+    """Codec backed by orjson"""
+
+    name = "orjson"
+
+    def __init__(self) -> None:
+        if orjson is None:
+            raise RuntimeError("orjson is not installed")
+
+    def dumps(self, obj: Any) -> str:
+        return orjson.dumps(obj).decode()
+
+    def encode(self, obj: Any) -> bytes:
+        return orjson.dumps(obj)
+
+    def decode(self, data: bytes | str) -> Any:
+        return orjson.loads(data)
+
+
+class MsgspecCodec(JsonCodec):
+    """Codec backed by msgspec"""
+
+    name = "msgspec"
+
+    def __init__(self) -> None:
+        if msgspec is None:
+            raise RuntimeError("msgspec is not installed")
+        self._encoder = msgspec.json.Encoder()
+        self._decoder = msgspec.json.Decoder()
+
+    def dumps(self, obj: Any) -> str:
+        return self._encoder.encode(obj).decode()
+
+    def encode(self, obj: Any) -> bytes:
+        return self._encoder.encode(obj)
+
+    def decode(self, data: bytes | str) -> Any:
+        return self._decoder.decode(data)
+
+
+def detect_codec() -> JsonCodec:
+    """
+    The fastest available codec: orjson, msgspec or the json module
+    """
+    if orjson is not None:
+        return OrjsonCodec()
+    if msgspec is not None:
+        return MsgspecCodec()
+    return JsonCodec()
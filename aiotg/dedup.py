@@ -0,0 +1,151 @@
+import os
+from collections import deque
+from collections.abc import Iterable
+from typing import IO, Any
+
+
+class DedupBackend:
+    """
+    Persistent storage for the ids of an :class:`UpdateDedup` window, so
+    that updates handled before a restart are still recognized after it.
+    The base class keeps nothing, subclass it for the storage of your choice.
+    """
+
+    def load(self, size: int) -> Iterable[int]:
+        """Return up to ``size`` most recently stored ids, oldest first"""
+        return ()
+
+    def add(self, update_id: int) -> None:
+        """Store a seen update id"""
+
+    def close(self) -> None:
+        pass
+
+
+class FileDedupBackend(DedupBackend):
+    """
+    Keeps seen update ids in a file, one per line. Ids are appended as they
+    come, and the file is rewritten with only the window once it grows to
+    twice its size. The rewrite goes to a temporary file renamed over the
+    old one, so a crash leaves either of them whole.
+
+    :param str path: File to keep the ids in
+
+    :Example:
+
+    >>> bot = Bot(api_token, dedup=UpdateDedup(backend=FileDedupBackend("seen")))
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path: str = path
+        self._ids: deque[int] = deque()
+        self._file: IO[str] | None = None
+        self._lines: int = 0
+
+    def load(self, size: int) -> Iterable[int]:
+        self._ids = deque(maxlen=size)
+        try:
+            with open(self.path) as f:
+                for line in f:
+                    # A line without the newline is a torn write
+                    if line.endswith("\n"):
+                        self._ids.append(int(line))
+        except FileNotFoundError:
+            pass
+        self._compact()
+        return list(self._ids)
+
+    def add(self, update_id: int) -> None:
+        self._ids.append(update_id)
+        if self._file is None or self._lines >= 2 * len(self._ids):
+            self._compact()
+            return
+        self._file.write(f"{update_id}\n")
+        self._file.flush()
+        self._lines += 1
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _compact(self) -> None:
+        self.close()
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            f.writelines(f"{update_id}\n" for update_id in self._ids)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        self._file = open(self.path, "a")
+        self._lines = len(self._ids)
+
+
+class UpdateDedup:
+    """
+    Window of the last ``size`` update ids the bot has seen, used to drop
+    updates delivered again: webhook retries after a slow or failed
+    response, or updates polled again after a restart.
+
+    Ids are kept in a ring with a set for lookups, the oldest id leaves the
+    window when a new one comes in. Dropped updates are counted in ``hits``.
+
+    :param int size: Number of ids to remember
+    :param backend: Persistent storage for the window, see
+        :class:`FileDedupBackend`
+
+    :Example:
+
+    >>> bot = Bot(api_token, dedup=UpdateDedup(10000))
+    >>> bot.dedup.stats()
+    {'hits': 0, 'tracked': 0}
+    """
+
+    def __init__(self, size: int = 10000, backend: DedupBackend | None = None) -> None:
+        self.size: int = size
+        self.backend: DedupBackend | None = backend
+        self.hits: int = 0
+        self._ids: deque[int] = deque()
+        self._seen: set[int] = set()
+        if backend is not None:
+            for update_id in backend.load(size):
+                self._remember(update_id)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, update_id: int) -> bool:
+        return update_id in self._seen
+
+    def seen(self, update_id: int, persist: bool = True) -> bool:
+        """
+        Check an update id against the window, recording it if it's new
+
+        :param bool persist: Store a new id in the backend right away,
+            otherwise it's stored by :meth:`persist`
+        :return: True if the update was seen before and should be dropped
+        """
+        if update_id in self._seen:
+            self.hits += 1
+            return True
+        self._remember(update_id)
+        if persist:
+            self.persist(update_id)
+        return False
+
+    def persist(self, update_id: int) -> None:
+        """Store an id in the backend, if there is one"""
+        if self.backend is not None:
+            self.backend.add(update_id)
+
+    def stats(self) -> dict[str, Any]:
+        """Dedup metrics: dropped duplicates and ids in the window"""
+        return {"hits": self.hits, "tracked": len(self._ids)}
+
+    def _remember(self, update_id: int) -> None:
+        if update_id in self._seen:
+            return
+        if len(self._ids) >= self.size:
+            self._seen.discard(self._ids.popleft())
+        self._ids.append(update_id)
+        self._seen.add(update_id)
@@ -0,0 +1,279 @@
+import asyncio
+import hashlib
+import uuid
+from collections.abc import Awaitable, Hashable, Iterator, Mapping
+from types import MethodType
+from typing import Any, Unpack
+
+import aiohttp
+from aiohttp import web
+
+from .bot import SECRET_HEADER, Bot, UpdateHandler
+from .types_ import TG_SetWebhookOpts
+from .dedup import UpdateDedup
+
+
+class _TenantHandlers(Mapping[str, UpdateHandler]):
+    # Update processors of the base bot, bound to the tenant
+    __slots__ = ("_tenant",)
+
+    def __init__(self, tenant: "TenantBot") -> None:
+        self._tenant = tenant
+
+    def __getitem__(self, key: str) -> UpdateHandler:
+        handler = self._tenant._base._update_handlers[key]
+        if isinstance(handler, MethodType) and handler.__self__ is self._tenant._base:
+            return MethodType(handler.__func__, self._tenant)
+        return handler
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._tenant._base._update_handlers)
+
+    def __len__(self) -> int:
+        return len(self._tenant._base._update_handlers)
+
+
+class _TenantDedup(UpdateDedup):
+    """
+    The base bot's dedup window as seen by one tenant. Update ids are only
+    unique per bot, so they are stored with the bot id in the upper bits.
+    """
+
+    def __init__(self, base: UpdateDedup, bot_id: int) -> None:
+        # UpdateDedup.__init__ is skipped on purpose, the window and the
+        # backend are the base ones
+        self._base: UpdateDedup = base
+        self._prefix: int = bot_id << 32
+
+    def __getattr__(self, name: str) -> Any:
+        if name == "_base":
+            raise AttributeError(name)
+        return getattr(self._base, name)
+
+    def __contains__(self, update_id: int) -> bool:
+        return self._prefix | update_id in self._base
+
+    def seen(self, update_id: int, persist: bool = True) -> bool:
+        return self._base.seen(self._prefix | update_id, persist)
+
+    def persist(self, update_id: int) -> None:
+        self._base.persist(self._prefix | update_id)
+
+
+class TenantBot(Bot):
+    """
+    Bot with its own token and webhook secret and everything else, like
+    handlers, session, scheduler and settings, taken from a base bot.
+    Register handlers on the base bot.
+
+    With ``dedup`` set on the base bot, tenants share its window and
+    backend, with update ids told apart by the bot id, so size the window
+    for all tenants together. Telegram limits are per bot: tenants get rate
+    limiters of their own with the limits of the base one, created on their
+    first API call, and handlers of each tenant run in lanes of their own
+    in an ordered scheduler.
+    """
+
+    # Settings, handlers and connection machinery taken from the base bot,
+    # any other state is the tenant's own
+    _SHARED = frozenset(
+        [
+            "api_timeout",
+            "name",
+            "codec",
+            "json_serialize",
+            "json_deserialize",
+            "default_in_groups",
+            "webhook_reply_timeout",
+            "_connector",
+            "pools",
+            "_pool_sessions",
+            "scheduler",
+            "retry_policy",
+            "retry_policies",
+            "at_least_once",
+            "settle_timeout",
+            "api_call_timeout",
+            "file_timeout",
+            "_api_error_hooks",
+            "_handlers",
+            "_commands",
+            "_callbacks",
+            "_inlines",
+            "_chosen_inline_result_callbacks",
+            "_checkouts",
+            "_default",
+            "_default_callback",
+            "_default_inline",
+            "_default_chosen_inline_result_callback",
+            "_default_checkout",
+        ]
+    )
+
+    def __init__(
+        self,
+        base: Bot,
+        api_token: str,
+        secret: str,
+        host: "WebhookHost | None" = None,
+    ) -> None:
+        # Bot.__init__ is skipped on purpose, see __getattr__
+        self._base: Bot = base
+        self._host: WebhookHost | None = host
+        self.api_token = api_token
+        self._webhook_uuid = secret
+        self.dedup = (
+            _TenantDedup(base.dedup, int(WebhookHost.bot_id(api_token)))
+            if base.dedup is not None
+            else None
+        )
+
+    def __getattr__(self, name: str) -> Any:
+        if name in self._SHARED:
+            return getattr(self._base, name)
+        # State of the tenant's own, created on first use
+        if name == "rate_limiter":
+            limiter = self._base.rate_limiter
+            value: Any = None if limiter is None else limiter.copy()
+        elif name == "_unsettled":
+            value = {}
+        elif name == "_settled":
+            value = asyncio.Event()
+        else:
+            raise AttributeError(name)
+        setattr(self, name, value)
+        return value
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        return self._base.session
+
+    @property
+    def _update_handlers(self) -> Mapping[str, UpdateHandler]:  # type: ignore[override]
+        return _TenantHandlers(self)
+
+    def _scheduler_lane(self, payload: Any) -> Hashable | None:
+        lane = self._update_lane(payload)
+        return None if lane is None else (self.api_token, lane)
+
+    def set_webhook(
+        self, webhook_url: str, **options: Unpack[TG_SetWebhookOpts]
+    ) -> Awaitable[Any]:
+        """
+        Register the webhook url, with the tenant's secret unless another
+        one is given, in which case the host routes by the new one
+        """
+        old_secret = self._webhook_uuid or ""
+        if "secret_token" not in options:
+            options["secret_token"] = old_secret
+        call = super().set_webhook(webhook_url, **options)
+        if self._host is not None and self._webhook_uuid != old_secret:
+            self._host._rekey(self, old_secret)
+        return call
+
+    async def close(self) -> None:
+        """
+        Does nothing, the session belongs to the base bot
+        """
+
+
+def _secret_key(secret: str) -> bytes:
+    # Secrets are looked up by digest, so lookup timing tells nothing about them
+    return hashlib.sha256(secret.encode()).digest()
+
+
+class WebhookHost:
+    """
+    Serves webhooks of many bots running the same handlers from a single
+    aiohttp app, sharing one session and connector.
+
+    Telegram requests are routed to the tenant by the bot id in the path,
+    ``{path}/{bot_id}``, or by the secret token alone when posted to
+    ``path``. Secrets are checked in constant time. Per tenant the host only
+    keeps a small :class:`TenantBot` with the token and the secret.
+
+    :param bot: Base bot with the handlers and settings of all tenants
+    :param str path: Webhook path prefix
+
+    :Example:
+
+    >>> host = WebhookHost(bot)
+    >>> for token in tokens:
+    >>>     tenant = host.add(token)
+    >>>     await tenant.set_webhook(
+    >>>         host.webhook_url(tenant, "https://example.com"),
+    >>>         secret_token=tenant._webhook_uuid,
+    >>>     )
+    >>> web.run_app(host.create_webhook_app())
+    """
+
+    def __init__(self, bot: Bot, path: str = "/webhook") -> None:
+        self.bot: Bot = bot
+        self.path: str = path.rstrip("/")
+        self._by_id: dict[str, TenantBot] = {}
+        self._by_secret: dict[bytes, TenantBot] = {}
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def add(self, api_token: str, secret: str | None = None) -> TenantBot:
+        """
+        Add a bot, replacing the one with the same id
+
+        :param str api_token: Bot token
+        :param str secret: Webhook secret token, generated if not given
+        :return: The tenant bot, use it to set the webhook
+        """
+        bot_id = self.bot_id(api_token)
+        self.remove(api_token)
+        tenant = TenantBot(self.bot, api_token, secret or uuid.uuid4().hex, self)
+        self._by_id[bot_id] = tenant
+        self._by_secret[_secret_key(tenant._webhook_uuid or "")] = tenant
+        return tenant
+
+    def remove(self, api_token: str) -> None:
+        tenant = self._by_id.pop(self.bot_id(api_token), None)
+        if tenant is not None:
+            self._by_secret.pop(_secret_key(tenant._webhook_uuid or ""), None)
+
+    def _rekey(self, tenant: TenantBot, old_secret: str) -> None:
+        if self._by_secret.get(_secret_key(old_secret)) is tenant:
+            del self._by_secret[_secret_key(old_secret)]
+        self._by_secret[_secret_key(tenant._webhook_uuid or "")] = tenant
+
+    def get(self, bot_id: str) -> TenantBot | None:
+        return self._by_id.get(bot_id)
+
+    @staticmethod
+    def bot_id(api_token: str) -> str:
+        """Bot id, the part of the token before the colon"""
+        return api_token.split(":", 1)[0]
+
+    def webhook_url(self, tenant: TenantBot, base_url: str) -> str:
+        return "{0}{1}/{2}".format(
+            base_url.rstrip("/"), self.path, self.bot_id(tenant.api_token)
+        )
+
+    async def handle(self, request: web.Request) -> web.Response:
+        """
+        aiohttp.web handle routing webhook requests to tenants
+        """
+        bot_id = request.match_info.get("bot_id")
+        if bot_id is not None:
+            tenant = self._by_id.get(bot_id)
+        else:
+            secret = request.headers.get(SECRET_HEADER)
+            tenant = self._by_secret.get(_secret_key(secret)) if secret else None
+        if tenant is None:
+            return web.Response(status=403)
+        return await tenant.webhook_handle(request)
+
+    def create_webhook_app(self) -> web.Application:
+        """
+        Create aiohttp.web.Application serving webhooks of all tenants
+        """
+        app = web.Application()
+        app.router.add_route("POST", self.path, self.handle)
+        app.router.add_route("POST", self.path + "/{bot_id}", self.handle)
+        app.on_cleanup.append(lambda _: self.bot.close())
+        return app
@@ -0,0 +1,108 @@
+"""
+Lazy decoding of updates. Requires msgspec.
+
+>>> from aiotg.lazy import LazyCodec
+>>> bot = Bot(api_token, codec=LazyCodec())
+"""
+
+from typing import Any
+
+import msgspec
+
+from .codec import MsgspecCodec
+
+# Payload fields decoded right away, dispatching needs them for every update
+ROUTING_FIELDS = ("message_id", "date", "chat", "from", "text", "data", "query", "id")
+
+_decode = msgspec.json.decode
+
+
+class LazyDict(dict[str, Any]):
+    """
+    dict that keeps its values as raw JSON and decodes each one on first
+    access. Keys are known upfront, so ``in``, ``len`` and iteration over
+    keys are as cheap as with a regular dict.
+    """
+
+    __slots__ = ()
+
+    def __getitem__(self, key: str) -> Any:
+        value = dict.__getitem__(self, key)
+        if type(value) is msgspec.Raw:
+            value = _decode(value)
+            dict.__setitem__(self, key, value)
+        return value
+
+    def __iter__(self) -> Any:
+        # Overriding __iter__ stops dict(view) from copying raw values
+        return iter(self.keys())
+
+    def __eq__(self, other: object) -> bool:
+        return dict(self.items()) == other
+
+    def __ne__(self, other: object) -> bool:
+        return not self == other
+
+    def __repr__(self) -> str:
+        return repr(dict(self.items()))
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self[key] if key in self else default
+
+    def pop(self, key: str, *default: Any) -> Any:
+        value = dict.pop(self, key, *default)
+        return _decode(value) if type(value) is msgspec.Raw else value
+
+    def values(self) -> list[Any]:  # type: ignore[override]
+        return [self[key] for key in self.keys()]
+
+    def items(self) -> list[tuple[str, Any]]:  # type: ignore[override]
+        return [(key, self[key]) for key in self.keys()]
+
+    def copy(self) -> dict[str, Any]:
+        return dict(self.items())
+
+
+class LazyCodec(MsgspecCodec):
+    """
+    msgspec codec decoding update payloads (messages, callback queries,
+    inline queries and the rest) into :class:`LazyDict` views. The fields
+    used for routing are decoded right away, everything else, like
+    entities, photos or reply_to_message, only when a handler reads it.
+    Other API responses are decoded into dicts as usual.
+    """
+
+    name = "msgspec-lazy"
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._fields = msgspec.json.Decoder(dict[str, msgspec.Raw])
+        self._batch = msgspec.json.Decoder(list[dict[str, msgspec.Raw]])
+
+    def decode_update(self, data: bytes | str) -> Any:
+        return self._update(self._fields.decode(data))
+
+    def decode_updates(self, data: bytes | str) -> Any:
+        response: dict[str, Any] = self._fields.decode(data)
+        for key, raw in response.items():
+            if key == "result":
+                response[key] = [self._update(u) for u in self._batch.decode(raw)]
+            else:
+                response[key] = _decode(raw)
+        return response
+
+    def _update(self, fields: dict[str, msgspec.Raw]) -> dict[str, Any]:
+        update: dict[str, Any] = {}
+        for key, raw in fields.items():
+            if memoryview(raw)[:1] == b"{":
+                update[key] = self._payload(raw)
+            else:
+                update[key] = _decode(raw)
+        return update
+
+    def _payload(self, raw: msgspec.Raw) -> LazyDict:
+        payload = LazyDict(self._fields.decode(raw))
+        for key in ROUTING_FIELDS:
+            if key in payload:
+                payload[key]
+        return payload
@@ -11,7 +11,13 @@ class MockBot(Bot):
         self.calls: dict[str, Any] = {}
 
     @override
-    def api_call(self, method: str, **params: Any) -> Awaitable[Any]:
+    def api_call(
+        self,
+        method: str,
+        deadline: float | None = None,
+        fire_and_forget: bool = False,
+        **params: Any,
+    ) -> Awaitable[Any]:
         self.calls[method] = params
         try:
             loop = asyncio.get_event_loop()
@@ -0,0 +1,85 @@
+import os
+import time
+
+
+class OffsetStore:
+    """
+    Storage for the polling offset, the id of the last update the bot is
+    done with, so that polling resumes where it stopped after a restart.
+    The base class keeps nothing, subclass it for the storage of your choice.
+    """
+
+    def load(self) -> int:
+        """Return the stored offset, 0 if there is none"""
+        return 0
+
+    def save(self, offset: int) -> None:
+        """
+        Store the offset, called after every batch of updates. Stores may
+        batch writes, as long as :meth:`flush` writes everything.
+        """
+
+    def flush(self) -> None:
+        pass
+
+
+class FileOffsetStore(OffsetStore):
+    """
+    Keeps the polling offset in a file. Saves are batched: the file is
+    written once the offset has advanced by ``flush_every`` updates or
+    ``flush_interval`` seconds have passed since the last write, and when
+    the bot is closed. Every write goes to a temporary file renamed over
+    the old one, so a crash leaves either the old or the new offset.
+
+    A crash loses at most one batch of saves, and those updates are
+    polled again after the restart.
+
+    :param str path: File to keep the offset in
+    :param int flush_every: Updates between writes
+    :param float flush_interval: Seconds between writes
+
+    :Example:
+
+    >>> bot = Bot(api_token, offset_store=FileOffsetStore("offset"))
+    """
+
+    def __init__(
+        self, path: str, flush_every: int = 100, flush_interval: float = 1.0
+    ) -> None:
+        self.path: str = path
+        self.flush_every: int = flush_every
+        self.flush_interval: float = flush_interval
+        self._offset: int = 0
+        self._flushed_offset: int = 0
+        self._flushed_at: float = time.monotonic()
+
+    def load(self) -> int:
+        try:
+            with open(self.path) as f:
+                self._offset = int(f.read().strip() or 0)
+        except FileNotFoundError:
+            self._offset = 0
+        self._flushed_offset = self._offset
+        return self._offset
+
+    def save(self, offset: int) -> None:
+        self._offset = offset
+        if offset == self._flushed_offset:
+            return
+        if (
+            offset - self._flushed_offset >= self.flush_every
+            or time.monotonic() - self._flushed_at >= self.flush_interval
+        ):
+            self.flush()
+
+    def flush(self) -> None:
+        if self._offset == self._flushed_offset:
+            return
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            f.write(f"{self._offset}\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        self._flushed_offset = self._offset
+        self._flushed_at = time.monotonic()
@@ -0,0 +1,62 @@
+import aiohttp
+
+# Pool names: Bot API calls, the getUpdates long poll and file downloads
+API_POOL = "api"
+POLL_POOL = "poll"
+FILE_POOL = "file"
+
+
+class ConnectionPools:
+    """
+    Separate connection pools for Bot API calls, the getUpdates long poll
+    and file downloads, so that a long poll or a burst of large downloads
+    can't take the connections replies are waiting for.
+
+    Every pool keeps idle connections alive for ``keepalive_timeout``
+    seconds and caches DNS lookups for ``dns_cache_ttl`` seconds. With
+    ``warm_up`` set, the bot opens that many connections per pool when it
+    starts, so the first replies don't pay for the TLS handshake.
+
+    :param int api_limit: Maximum number of connections for API calls
+    :param int poll_limit: Maximum number of connections for long polling,
+        pipelined polling holds up to two at a time
+    :param int file_limit: Maximum number of connections for downloads
+    :param float keepalive_timeout: Idle connection lifetime
+    :param int dns_cache_ttl: DNS cache lifetime
+    :param int warm_up: Connections to open per pool on startup
+
+    :Example:
+
+    >>> bot = Bot(api_token, pools=ConnectionPools(api_limit=50, warm_up=2))
+    """
+
+    def __init__(
+        self,
+        api_limit: int = 30,
+        poll_limit: int = 2,
+        file_limit: int = 4,
+        keepalive_timeout: float = 60.0,
+        dns_cache_ttl: int = 300,
+        warm_up: int = 0,
+    ) -> None:
+        self.limits: dict[str, int] = {
+            API_POOL: api_limit,
+            POLL_POOL: poll_limit,
+            FILE_POOL: file_limit,
+        }
+        self.keepalive_timeout: float = keepalive_timeout
+        self.dns_cache_ttl: int = dns_cache_ttl
+        self.warm_up: int = warm_up
+
+    def connector(self, pool: str) -> aiohttp.TCPConnector:
+        """
+        Create the connector of a pool
+        """
+        limit = self.limits[pool]
+        return aiohttp.TCPConnector(
+            limit=limit,
+            limit_per_host=limit,
+            keepalive_timeout=self.keepalive_timeout,
+            use_dns_cache=True,
+            ttl_dns_cache=self.dns_cache_ttl,
+        )
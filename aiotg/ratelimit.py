@@ -0,0 +1,186 @@
+import asyncio
+from typing import Any
+
+# (number of calls, period in seconds, burst)
+Limit = tuple[float, float, int]
+
+MESSAGE_METHODS = frozenset(
+    ["forwardMessage", "forwardMessages", "copyMessage", "copyMessages"]
+)
+
+
+def method_class(method: str) -> str:
+    """
+    Rate limiting class of an API method: ``"message"`` for everything that
+    posts a message to a chat, ``"edit"``, ``"answer"``, ``"action"``
+    for sendChatAction and ``"other"``
+    """
+    if method == "sendChatAction":
+        return "action"
+    if method.startswith("send") or method in MESSAGE_METHODS:
+        return "message"
+    if method.startswith("edit"):
+        return "edit"
+    if method.startswith("answer"):
+        return "answer"
+    return "other"
+
+
+class TokenBucket:
+    """
+    Token bucket in its GCRA form: ``rate`` tokens per ``per`` seconds with up
+    to ``burst`` tokens spent at once. Tokens are reserved in call order, so
+    waiters are served first come, first served.
+    """
+
+    def __init__(self, rate: float, per: float = 1.0, burst: int = 1) -> None:
+        self.interval: float = per / rate
+        self.tolerance: float = self.interval * (burst - 1)
+        self.tat: float = 0.0
+
+    def reserve(self, now: float) -> float:
+        """
+        Take a token and return the delay before it may be used
+        """
+        tat = max(self.tat, now)
+        self.tat = tat + self.interval
+        return max(0.0, tat - self.tolerance - now)
+
+    def idle(self, now: float) -> bool:
+        """True if the bucket is full again"""
+        return self.tat <= now
+
+
+class _ChatLane:
+    def __init__(self, bucket: TokenBucket) -> None:
+        self.bucket: TokenBucket = bucket
+        self.lock: asyncio.Lock = asyncio.Lock()
+        self.waiting: int = 0
+
+
+async def _sleep(delay: float) -> None:
+    if delay > 0:
+        await asyncio.sleep(delay)
+
+
+class RateLimiter:
+    """
+    Paces outgoing API calls to stay under Telegram limits instead of
+    running into 429 responses.
+
+    Messages are limited per chat (``private_limit`` for users,
+    ``group_limit`` for groups and channels) and globally. Calls to the same
+    chat are queued one after another, so a busy chat only holds one slot in
+    the global queue at a time and can't starve the others.
+    ``method_limits`` adds limits per method class (see :func:`method_class`).
+
+    Limits are ``(calls, period, burst)`` tuples.
+
+    :Example:
+
+    >>> bot = Bot(api_token, rate_limiter=RateLimiter())
+    """
+
+    def __init__(
+        self,
+        global_limit: Limit = (30, 1.0, 1),
+        private_limit: Limit = (1, 1.0, 1),
+        group_limit: Limit = (20, 60.0, 3),
+        method_limits: dict[str, Limit] | None = None,
+    ) -> None:
+        self.global_limit: Limit = global_limit
+        self.private_limit: Limit = private_limit
+        self.group_limit: Limit = group_limit
+        self.method_limits: dict[str, Limit] = method_limits or {}
+        self._global: TokenBucket = TokenBucket(*global_limit)
+        self._methods: dict[str, TokenBucket] = {
+            cls: TokenBucket(*limit) for cls, limit in self.method_limits.items()
+        }
+        self._chats: dict[int | str, _ChatLane] = {}
+        self._sweep_at: int = 1024
+        self.queued: int = 0
+
+    def copy(self) -> "RateLimiter":
+        """A limiter with the same limits and nothing spent yet"""
+        return RateLimiter(
+            self.global_limit,
+            self.private_limit,
+            self.group_limit,
+            self.method_limits,
+        )
+
+    @property
+    def chats(self) -> int:
+        """Number of chats with tracked limits"""
+        return len(self._chats)
+
+    def depth(self, chat_id: int | str) -> int:
+        """Number of calls waiting for the chat"""
+        lane = self._chats.get(self._chat_key(chat_id))
+        return lane.waiting if lane else 0
+
+    def stats(self) -> dict[str, Any]:
+        """Queue depth metrics: waiting calls and tracked chats"""
+        return {"queued": self.queued, "chats": self.chats}
+
+    async def acquire(self, method: str, chat_id: int | str | None = None) -> None:
+        """
+        Wait until the call is allowed to go out
+        """
+        cls = method_class(method)
+        loop = asyncio.get_running_loop()
+        self.queued += 1
+        try:
+            bucket = self._methods.get(cls)
+            if bucket is not None:
+                await _sleep(bucket.reserve(loop.time()))
+            if cls != "message":
+                return
+            if chat_id is None:
+                await _sleep(self._global.reserve(loop.time()))
+            else:
+                await self._acquire_chat(self._chat_key(chat_id))
+        finally:
+            self.queued -= 1
+
+    async def _acquire_chat(self, key: int | str) -> None:
+        loop = asyncio.get_running_loop()
+        lane = self._chats.get(key)
+        if lane is None:
+            self._sweep(loop.time())
+            private = isinstance(key, int) and key > 0
+            limit = self.private_limit if private else self.group_limit
+            lane = self._chats[key] = _ChatLane(TokenBucket(*limit))
+
+        lane.waiting += 1
+        try:
+            async with lane.lock:
+                await _sleep(lane.bucket.reserve(loop.time()))
+                await _sleep(self._global.reserve(loop.time()))
+                # The global queue may have held the call back,
+                # count the chat interval from the actual send time
+                lane.bucket.tat = max(
+                    lane.bucket.tat, loop.time() + lane.bucket.interval
+                )
+        finally:
+            lane.waiting -= 1
+
+    def _sweep(self, now: float) -> None:
+        if len(self._chats) < self._sweep_at:
+            return
+        self._chats = {
+            key: lane
+            for key, lane in self._chats.items()
+            if lane.waiting or not lane.bucket.idle(now)
+        }
+        self._sweep_at = max(1024, 2 * len(self._chats))
+
+    @staticmethod
+    def _chat_key(chat_id: int | str) -> int | str:
+        # Chat helpers pass ids both as int and str
+        if isinstance(chat_id, str):
+            try:
+                return int(chat_id)
+            except ValueError:
+                return chat_id
+        return chat_id
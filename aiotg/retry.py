@@ -0,0 +1,86 @@
+import random
+
+import aiohttp
+
+RETRY_TIMEOUT = 30
+RETRY_CODES = [429, 500, 502, 503, 504]
+
+
+class RetryPolicy:
+    """
+    Decides whether and when a failed API call is retried.
+
+    429 responses are retried after the ``retry_after`` Telegram sends with
+    them, other retry codes and network errors back off exponentially from
+    ``base_delay`` up to ``max_delay`` with random jitter. Retrying stops
+    after ``max_attempts`` attempts or once the next attempt would start
+    after ``deadline`` seconds since the first one.
+
+    :param int max_attempts: Total number of attempts, 0 means no limit
+    :param float deadline: Time budget for all attempts, in seconds
+    :param float base_delay: Backoff before the first retry
+    :param float max_delay: Backoff cap
+    :param retry_codes: HTTP statuses worth retrying
+    :param bool network_errors: Retry on network errors. Failures to
+        connect are retried for every method, since the request never went
+        out. Timeouts and connections broken mid-request are only retried
+        for ``get*`` methods, which are safe to repeat.
+    :param bool retry_timeouts: Retry timeouts and connections broken
+        mid-request for all methods. Telegram might have processed the
+        request before the connection broke, so sends could be duplicated.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 5,
+        deadline: float | None = None,
+        base_delay: float = 1.0,
+        max_delay: float = RETRY_TIMEOUT,
+        retry_codes: list[int] = RETRY_CODES,
+        network_errors: bool = True,
+        retry_timeouts: bool = False,
+    ) -> None:
+        self.max_attempts: int = max_attempts
+        self.deadline: float | None = deadline
+        self.base_delay: float = base_delay
+        self.max_delay: float = max_delay
+        self.retry_codes: frozenset[int] = frozenset(retry_codes)
+        self.network_errors: bool = network_errors
+        self.retry_timeouts: bool = retry_timeouts
+
+    def retries_error(self, method: str, error: Exception) -> bool:
+        """
+        Whether a network error raised by an API call is worth retrying
+
+        :param str method: Telegram API method called
+        :param error: Exception raised by the request
+        """
+        if not self.network_errors:
+            return False
+        if isinstance(error, aiohttp.ClientConnectorError):
+            return True
+        return self.retry_timeouts or method.startswith("get")
+
+    def next_delay(
+        self, attempt: int, elapsed: float, retry_after: float | None = None
+    ) -> float | None:
+        """
+        Delay before the next attempt, or ``None`` to give up
+
+        :param int attempt: Number of attempts made so far
+        :param float elapsed: Seconds since the first attempt
+        :param float retry_after: Delay requested by the server
+        """
+        if self.max_attempts and attempt >= self.max_attempts:
+            return None
+        if retry_after is not None:
+            delay = float(retry_after)
+        else:
+            backoff = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+            delay = random.uniform(backoff / 2, backoff)
+        if self.deadline is not None and elapsed + delay > self.deadline:
+            return None
+        return delay
+
+
+NO_RETRY = RetryPolicy(max_attempts=1)
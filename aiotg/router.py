@@ -0,0 +1,209 @@
+import re
+from collections.abc import Iterator
+from typing import Any, Callable
+
+# Anchored "/command" patterns that can only match when the leading token of
+# the text (whitespace separated, "@botname" stripped) is exactly that command
+_INDEXABLE_COMMAND = re.compile(
+    r"(?:\^|\\A)\\?(/[A-Za-z0-9_]+)(?:[ @$]|\\Z|\\s)(?![*?{])"
+)
+
+# The only non-ASCII characters re.I considers equal to ASCII letters
+_FOLDS_TO_ASCII = re.compile("[\u0130\u0131\u017f\u212a]")
+
+_META = frozenset(".^$*+?{}[]\\|()")
+_QUANTIFIERS = frozenset("*+?{")
+
+
+def _has_top_level_alternation(pattern: str) -> bool:
+    depth = 0
+    in_class = False
+    chars = iter(pattern)
+    for c in chars:
+        if c == "\\":
+            next(chars, None)
+        elif in_class:
+            in_class = c != "]"
+        elif c == "[":
+            in_class = True
+            # "]" right after "[" or "[^" is a literal
+            c = next(chars, "")
+            if c == "^":
+                c = next(chars, "")
+            if c == "\\":
+                next(chars, None)
+        elif c == "(":
+            depth += 1
+        elif c == ")":
+            depth -= 1
+        elif c == "|" and depth == 0:
+            return True
+    return False
+
+
+def _foldable(text: str) -> str | None:
+    """Lowercase text for keying, or None if re.I could match it differently"""
+    if not text.isascii() and _FOLDS_TO_ASCII.search(text):
+        return None
+    return text.lower()
+
+
+def command_key(pattern: str) -> str | None:
+    """
+    Return the "/command" a pattern is bound to, or ``None`` if the pattern
+    could match texts starting with anything else
+    """
+    if _has_top_level_alternation(pattern):
+        return None
+    m = _INDEXABLE_COMMAND.match(pattern)
+    return m.group(1).lower() if m else None
+
+
+def literal_prefix(pattern: str) -> str | None:
+    """
+    Return the literal text every match of an anchored pattern starts with,
+    or ``None`` if there is no such prefix
+    """
+    if _has_top_level_alternation(pattern):
+        return None
+    if pattern.startswith("^"):
+        i = 1
+    elif pattern.startswith("\\A"):
+        i = 2
+    else:
+        return None
+
+    # Pad the pattern so that lookahead never runs past its end
+    padded = pattern + "\0\0"
+    prefix: list[str] = []
+    while i < len(pattern):
+        c = padded[i]
+        step = 1
+        if c == "\\":
+            c = padded[i + 1]
+            step = 2
+            # \d, \s, \b, \1 and friends are not literals
+            if c == "\0" or c.isalnum() or c == "_":
+                break
+        elif c in _META:
+            break
+        if not c.isascii() or padded[i + step] in _QUANTIFIERS:
+            break
+        prefix.append(c)
+        i += step
+
+    return "".join(prefix).lower() or None
+
+
+class Route:
+    def __init__(
+        self, pattern: str, handler: Callable[..., Any], key: str | None
+    ) -> None:
+        self.pattern: str = pattern
+        self.handler: Callable[..., Any] = handler
+        self.regex: re.Pattern[str] = re.compile(pattern, re.I)
+        self.key: str | None = key
+        self.hits: int = 0
+
+
+class Router:
+    """
+    Compiled dispatch table of case-insensitive regexp handlers.
+
+    Patterns are compiled once on registration. Anchored patterns are indexed
+    by their literal prefix (``^vote:(\\d+)`` by ``vote:``), so a text is only
+    searched with the patterns its prefix can match and the unindexed ones.
+    As with plain ``re.search`` over the list, the first registered matching
+    pattern wins.
+    """
+
+    def __init__(self) -> None:
+        self._routes: list[Route] = []
+        self._keys: set[str] = set()
+        self._key_lengths: list[int] = []
+        self._plans: dict[tuple[str, ...] | None, tuple[Route, ...]] = {}
+        self.lookups: int = 0
+        self.misses: int = 0
+
+    def add(self, pattern: str, handler: Callable[..., Any]) -> None:
+        key = self._route_key(pattern)
+        self._routes.append(Route(pattern, handler, key))
+        if key is not None:
+            self._keys.add(key)
+            self._key_lengths = sorted({len(k) for k in self._keys})
+        self._plans.clear()
+
+    def __iter__(self) -> Iterator[tuple[str, Callable[..., Any]]]:
+        return ((r.pattern, r.handler) for r in self._routes)
+
+    def __len__(self) -> int:
+        return len(self._routes)
+
+    def match(self, text: str) -> tuple[Callable[..., Any], re.Match[str]] | None:
+        """
+        Find the first registered handler matching the text
+        """
+        self.lookups += 1
+        for route in self._plan(self._text_keys(text)):
+            m = route.regex.search(text)
+            if m:
+                route.hits += 1
+                return route.handler, m
+        self.misses += 1
+        return None
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Match statistics: number of lookups, lookups that matched nothing and
+        hits per pattern in registration order
+        """
+        return {
+            "lookups": self.lookups,
+            "misses": self.misses,
+            "hits": [(r.pattern, r.hits) for r in self._routes],
+        }
+
+    def _route_key(self, pattern: str) -> str | None:
+        return literal_prefix(pattern)
+
+    def _text_keys(self, text: str) -> tuple[str, ...] | None:
+        """
+        Index keys the text can match, or None when all routes are candidates
+        """
+        if not self._keys:
+            return ()
+        head = _foldable(text[: self._key_lengths[-1]])
+        if head is None:
+            return None
+        keys = self._keys
+        return tuple(
+            head[:n] for n in self._key_lengths if n <= len(head) and head[:n] in keys
+        )
+
+    def _plan(self, keys: tuple[str, ...] | None) -> tuple[Route, ...]:
+        plan = self._plans.get(keys)
+        if plan is None:
+            plan = self._plans[keys] = tuple(
+                r
+                for r in self._routes
+                if r.key is None or keys is None or r.key in keys
+            )
+        return plan
+
+
+class CommandRouter(Router):
+    """
+    Router for text commands, indexed by the leading "/command" token of the
+    message with the "@botname" suffix stripped
+    """
+
+    def _route_key(self, pattern: str) -> str | None:
+        return command_key(pattern)
+
+    def _text_keys(self, text: str) -> tuple[str, ...] | None:
+        if not text.startswith("/"):
+            return ()
+        token = _foldable(text.split(None, 1)[0].partition("@")[0])
+        if token is None:
+            return None
+        return (token,) if token in self._keys else ()
@@ -0,0 +1,153 @@
+import asyncio
+import logging
+from collections.abc import Iterable
+from typing import Any
+
+import aiohttp
+
+from .bot import Bot
+from .pools import FILE_POOL, POLL_POOL
+
+logger = logging.getLogger("aiotg")
+
+
+class PollingRunner:
+    """
+    Runs getUpdates polling of many bots in one event loop over shared
+    connectors, instead of a process, loop and session per bot.
+
+    Long polls and API calls go through separate connectors. Every bot
+    holds one long poll open at a time, two with ``pipeline``, and the poll
+    connector has a connection for each of them, so long polls never queue
+    behind each other. API calls and downloads of all bots share
+    ``connections`` connections of their own and wait for one in arrival
+    order, so a burst of them can't hold up polling, nor polls replies.
+    Bots start ``stagger`` seconds apart, so a restart doesn't open every
+    connection at once.
+
+    A bot whose polling stops with a fatal error, like a revoked token, is
+    logged and left stopped, the others keep running.
+
+    :param bots: Bots to poll
+    :param int connections: Connections shared by API calls of all bots
+    :param float stagger: Delay between starting bots
+    :param float shutdown_timeout: Time running handlers get to finish
+        on :meth:`stop`
+    :param options: Polling options passed to :meth:`Bot.loop`
+
+    :Example:
+
+    >>> runner = PollingRunner([Bot(token) for token in tokens])
+    >>> if __name__ == '__main__':
+    >>>     runner.run_forever()
+    """
+
+    def __init__(
+        self,
+        bots: Iterable[Bot],
+        connections: int = 30,
+        stagger: float = 0.05,
+        shutdown_timeout: float = 10.0,
+        **options: Any,
+    ) -> None:
+        self.bots: list[Bot] = list(bots)
+        self.connections: int = connections
+        self.stagger: float = stagger
+        self.shutdown_timeout: float = shutdown_timeout
+        self.options: dict[str, Any] = options
+        self.connector: aiohttp.TCPConnector | None = None
+        self.poll_connector: aiohttp.TCPConnector | None = None
+        self._tasks: list[asyncio.Task[None]] = []
+
+    @property
+    def poll_limit(self) -> int:
+        """Size of the poll connector"""
+        polls = 2 if self.options.get("pipeline") else 1
+        return polls * len(self.bots)
+
+    async def start(self) -> None:
+        """
+        Open the shared connectors and start polling all bots
+        """
+        if self._tasks:
+            raise RuntimeError("Runner is already started")
+        self.connector = aiohttp.TCPConnector(limit=self.connections, ttl_dns_cache=300)
+        self.poll_connector = aiohttp.TCPConnector(
+            limit=self.poll_limit, ttl_dns_cache=300
+        )
+        for i, bot in enumerate(self.bots):
+            await bot.close()
+            session = bot._new_session(self.connector, connector_owner=False)
+            bot._session = session
+            bot._pool_sessions = {
+                POLL_POOL: bot._new_session(self.poll_connector, connector_owner=False),
+                FILE_POOL: session,
+            }
+            task = asyncio.ensure_future(self._poll(bot, i * self.stagger))
+            self._tasks.append(task)
+
+    async def _poll(self, bot: Bot, delay: float) -> None:
+        await asyncio.sleep(delay)
+        try:
+            await bot.loop(**self.options)
+        except Exception:
+            logger.exception("Polling of %s stopped", bot.name or "bot")
+
+    async def wait(self) -> None:
+        """
+        Wait until polling of all bots has stopped
+        """
+        await asyncio.gather(*self._tasks)
+
+    async def stop(self) -> None:
+        """
+        Stop polling, give running handlers ``shutdown_timeout`` seconds
+        to finish, then close sessions of all bots and the connectors
+        """
+        tasks, self._tasks = self._tasks, []
+        for bot in self.bots:
+            bot.stop()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        joins = [bot.scheduler.join() for bot in self.bots]
+        try:
+            await asyncio.wait_for(asyncio.gather(*joins), self.shutdown_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(
+                "Handlers still running after %.1f sec.", self.shutdown_timeout
+            )
+            for bot in self.bots:
+                bot.scheduler.cancel()
+
+        for bot in self.bots:
+            for cleanup_action in bot._cleanups:
+                cleanup_action()
+            await bot.close()
+        for connector in (self.connector, self.poll_connector):
+            if connector is not None:
+                await connector.close()
+        self.connector = self.poll_connector = None
+
+    async def run(self) -> None:
+        """
+        Poll until all bots stop or the task is cancelled, then shut down
+        """
+        await self.start()
+        try:
+            await self.wait()
+        finally:
+            await self.stop()
+
+    def run_forever(self, debug: bool = False) -> None:
+        """
+        Convenience method running the bots until interrupted
+
+        :param bool debug: Enable debug logging
+        """
+        logging.basicConfig(level=logging.DEBUG if debug else logging.INFO)
+        try:
+            asyncio.run(self.run())
+        except KeyboardInterrupt:
+            logger.debug("User cancelled")
@@ -0,0 +1,162 @@
+import asyncio
+import logging
+from collections import deque
+from collections.abc import Awaitable, Hashable
+from contextvars import Context, copy_context
+from typing import Any
+
+logger = logging.getLogger("aiotg")
+
+# A queued handler with the context it was submitted in
+_Job = tuple[Awaitable[Any], Context]
+
+
+class UpdateScheduler:
+    """
+    Runs update handlers as tracked tasks with at most ``max_tasks`` of them
+    in flight, the rest wait in a queue.
+
+    The queue is bounded by producers: ``Bot.loop`` and ``Bot.webhook_handle``
+    call :meth:`wait_for_room` before accepting more updates, so the queue
+    can only overshoot ``max_queue`` by a single getUpdates batch.
+
+    An API call returned by a handler (``return chat.reply(...)``) is run
+    by the bot as the handler's job, so it waits for a slot and, in
+    ordered mode, for its lane like the handler would.
+
+    In ordered mode handlers submitted with the same lane (the chat id, or
+    the user id for inline queries) run one after another in submission
+    order, while different lanes still run in parallel. Lanes only exist
+    while they have work, so idle chats cost no memory.
+
+    Handlers run in a copy of the context they were submitted in, even
+    when they wait in the queue and get started after another one finishes.
+
+    :param int max_tasks: Maximum number of handlers running at once,
+        0 means no limit
+    :param int max_queue: Number of queued handlers after which producers
+        are paused, 0 means no limit
+    :param bool ordered: Run handlers of the same lane serially
+    """
+
+    def __init__(
+        self, max_tasks: int = 0, max_queue: int = 0, ordered: bool = False
+    ) -> None:
+        self.max_tasks: int = max_tasks
+        self.max_queue: int = max_queue
+        self.ordered: bool = ordered
+        self._tasks: dict[asyncio.Future[Any], Hashable | None] = {}
+        self._queue: deque[tuple[_Job, Hashable | None]] = deque()
+        self._lanes: dict[Hashable, deque[_Job]] = {}
+        self._lane_backlog: int = 0
+        self._waiters: list[asyncio.Future[None]] = []
+
+    @property
+    def in_flight(self) -> int:
+        """Number of running handlers"""
+        return len(self._tasks)
+
+    @property
+    def queued(self) -> int:
+        """Number of handlers waiting for a free slot or for their lane"""
+        return len(self._queue) + self._lane_backlog
+
+    @property
+    def lanes(self) -> int:
+        """Number of lanes with running or queued handlers"""
+        return len(self._lanes)
+
+    def full(self) -> bool:
+        return self.max_queue > 0 and self.queued >= self.max_queue
+
+    def submit(self, aw: Awaitable[Any], lane: Hashable | None = None) -> None:
+        """
+        Run the awaitable now if there is a free slot, queue it otherwise
+
+        :param lane: Key of the serial lane in ordered mode
+        """
+        job = (aw, copy_context())
+        if not self.ordered or lane is None:
+            self._enqueue(job, None)
+        elif lane in self._lanes:
+            self._lanes[lane].append(job)
+            self._lane_backlog += 1
+        else:
+            self._lanes[lane] = deque()
+            self._enqueue(job, lane)
+
+    async def wait_for_room(self) -> None:
+        """
+        Wait until the queue is below ``max_queue``
+        """
+        while self.full():
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            await waiter
+
+    async def join(self) -> None:
+        """
+        Wait for all running and queued handlers to finish
+        """
+        while self._tasks:
+            await asyncio.wait(list(self._tasks))
+
+    def cancel(self) -> None:
+        """
+        Drop queued handlers and cancel running ones
+        """
+        pending = [job for job, _ in self._queue]
+        for backlog in self._lanes.values():
+            pending.extend(backlog)
+        for aw, _ in pending:
+            if asyncio.iscoroutine(aw):
+                aw.close()
+        self._queue.clear()
+        self._lanes.clear()
+        self._lane_backlog = 0
+        for task in list(self._tasks):
+            task.cancel()
+        self._wake()
+
+    def _has_slot(self) -> bool:
+        return self.max_tasks <= 0 or len(self._tasks) < self.max_tasks
+
+    def _enqueue(self, job: _Job, lane: Hashable | None) -> None:
+        # Don't overtake handlers already waiting for a slot
+        if self._has_slot() and not self._queue:
+            self._start(job, lane)
+        else:
+            self._queue.append((job, lane))
+
+    def _start(self, job: _Job, lane: Hashable | None) -> None:
+        aw, context = job
+        if asyncio.iscoroutine(aw):
+            task = asyncio.get_running_loop().create_task(aw, context=context)
+        else:
+            task = asyncio.ensure_future(aw)
+        self._tasks[task] = lane
+        task.add_done_callback(self._done)
+
+    def _done(self, task: asyncio.Future[Any]) -> None:
+        lane = self._tasks.pop(task, None)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Update handler failed", exc_info=task.exception())
+
+        if lane is not None:
+            backlog = self._lanes.get(lane)
+            if backlog:
+                self._lane_backlog -= 1
+                self._enqueue(backlog.popleft(), lane)
+            elif backlog is not None:
+                del self._lanes[lane]
+
+        while self._queue and self._has_slot():
+            self._start(*self._queue.popleft())
+        if not self.full():
+            self._wake()
+
+    def _wake(self) -> None:
+        waiters, self._waiters = self._waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
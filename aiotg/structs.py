@@ -0,0 +1,184 @@
+"""
+Decoding of updates into msgspec structs generated from the ``TG_*``
+definitions in :mod:`aiotg.types_`. Requires msgspec.
+
+>>> from aiotg.structs import StructCodec
+>>> bot = Bot(api_token, codec=StructCodec())
+"""
+
+import keyword
+import logging
+import types
+from typing import Any, ClassVar, ForwardRef, Literal, Union
+from typing import get_args, get_origin, get_type_hints, is_typeddict
+
+import msgspec
+
+from . import types_
+from .codec import MsgspecCodec
+
+logger = logging.getLogger("aiotg")
+
+
+class TelegramStruct(
+    msgspec.Struct, omit_defaults=True, forbid_unknown_fields=True, gc=False
+):
+    """
+    Base of the generated structs with the read access of the dicts they
+    replace, so handlers written for dicts keep working. Fields Telegram
+    didn't send are ``None`` and missing as keys.
+
+    Decoded updates can't contain reference cycles, so the structs are
+    not tracked by the garbage collector.
+    """
+
+    # Telegram field name -> attribute name
+    _attrs: ClassVar[dict[str, str]] = {}
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        attr = self._attrs.get(key)
+        if attr is None:
+            raise KeyError(key)
+        setattr(self, attr, value)
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and self.get(key) is not None
+
+    def __iter__(self) -> Any:
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        return len(self.keys())
+
+    def get(self, key: str, default: Any = None) -> Any:
+        attr = self._attrs.get(key)
+        value = None if attr is None else getattr(self, attr)
+        return default if value is None else value
+
+    def keys(self) -> list[str]:
+        return [
+            key for key, attr in self._attrs.items() if getattr(self, attr) is not None
+        ]
+
+    def values(self) -> list[Any]:
+        return [self[key] for key in self.keys()]
+
+    def items(self) -> list[tuple[str, Any]]:
+        return [(key, self[key]) for key in self.keys()]
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert to plain dicts and lists, recursively"""
+        return msgspec.to_builtins(self)
+
+
+def _attr(key: str) -> str:
+    return key + "_" if keyword.iskeyword(key) else key
+
+
+def _convert(tp: Any, pending: list[Any]) -> Any:
+    """
+    Struct counterpart of a TypedDict field type, nested TypedDicts become
+    forward references to structs generated later
+    """
+    if tp is type(None) or tp in (int, float, str, bool):
+        return tp
+    if is_typeddict(tp):
+        pending.append(tp)
+        return ForwardRef(tp.__name__)
+
+    origin = get_origin(tp)
+    if origin is Literal:
+        return tp
+    if origin is list:
+        (arg,) = get_args(tp) or (Any,)
+        return list[_convert(arg, pending)]
+    if origin in (Union, types.UnionType):
+        args = get_args(tp)
+        # msgspec can't tell untagged structs apart, keep those as dicts
+        if sum(1 for arg in args if is_typeddict(arg)) > 1:
+            return Any
+        converted = tuple(_convert(arg, pending) for arg in args)
+        if Any in converted:
+            return Any
+        return Union[converted]
+    return Any
+
+
+def _generate(root: Any) -> None:
+    pending = [root]
+    while pending:
+        td = pending.pop()
+        name = td.__name__
+        if name in globals():
+            continue
+        hints = get_type_hints(td)
+        fields = [
+            (_attr(key), _convert(tp, pending) | None, None)
+            for key, tp in hints.items()
+        ]
+        cls = msgspec.defstruct(
+            name,
+            fields,
+            bases=(TelegramStruct,),
+            module=__name__,
+            rename={_attr(key): key for key in hints if _attr(key) != key},
+        )
+        cls._attrs = {key: _attr(key) for key in hints}
+        globals()[name] = cls
+
+
+_generate(types_.TG_Update)
+
+UpdatesResponse = msgspec.defstruct(
+    "UpdatesResponse",
+    [
+        ("ok", bool, False),
+        ("result", list[ForwardRef("TG_Update")] | None, None),
+        ("description", str | None, None),
+        ("error_code", int | None, None),
+    ],
+    bases=(TelegramStruct,),
+    module=__name__,
+)
+UpdatesResponse._attrs = {name: name for name in UpdatesResponse.__struct_fields__}
+
+
+class StructCodec(MsgspecCodec):
+    """
+    msgspec codec decoding getUpdates results and webhook bodies into
+    :class:`TelegramStruct` objects instead of nested dicts. Other API
+    responses are still decoded into dicts.
+
+    An update that doesn't match the ``TG_*`` definitions, including one
+    with fields they don't declare yet, is decoded into dicts as before,
+    so handlers never miss a field Telegram sent.
+    """
+
+    name = "msgspec-structs"
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._update_decoder = msgspec.json.Decoder(globals()["TG_Update"])
+        self._updates_decoder = msgspec.json.Decoder(UpdatesResponse)
+
+    def decode_update(self, data: bytes | str) -> Any:
+        try:
+            return self._update_decoder.decode(data)
+        except msgspec.ValidationError as e:
+            logger.warning("Update doesn't match its struct (%s), decoding as dict", e)
+            return self.decode(data)
+
+    def decode_updates(self, data: bytes | str) -> Any:
+        try:
+            return self._updates_decoder.decode(data)
+        except msgspec.ValidationError as e:
+            logger.warning(
+                "Updates don't match their struct (%s), decoding as dicts", e
+            )
+            return self.decode(data)
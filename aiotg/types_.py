@@ -467,6 +467,7 @@ TG_Message = TypedDict(
         "venue": TG_Venue,
         "location": TG_Location,
         "new_chat_members": list[TG_User],
+        "new_chat_member": TG_User,  # deprecated
         "left_chat_member": TG_User,
         "new_chat_title": str,
         "new_chat_photo": list[TG_PhotoSize],
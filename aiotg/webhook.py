@@ -0,0 +1,66 @@
+import asyncio
+from collections.abc import Awaitable
+from contextvars import ContextVar
+from typing import Any
+
+from .ratelimit import method_class
+
+# Reply slot of the webhook request being handled, handler tasks inherit it
+current_reply: ContextVar["WebhookReply | None"] = ContextVar(
+    "aiotg_webhook_reply", default=None
+)
+
+
+class WebhookReply:
+    """
+    Slot for a single API call returned in the body of a webhook response,
+    which Telegram then executes, saving a request of our own.
+
+    The slot takes the first call that sends, edits or answers something
+    in the chat the update came from, until the handler finishes or the
+    webhook stops waiting for it.
+    """
+
+    __slots__ = ("chat_id", "call", "_waiter")
+
+    def __init__(self) -> None:
+        self.chat_id: int | str | None = None
+        self.call: dict[str, Any] | None = None
+        self._waiter: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+
+    def claim(self, method: str, params: dict[str, Any]) -> bool:
+        """
+        Take the call if the slot is still open and the call fits
+        """
+        if self._waiter.done() or method_class(method) == "other":
+            return False
+        chat_id = params.get("chat_id")
+        if chat_id is not None and str(chat_id) != str(self.chat_id):
+            return False
+        self.call = {"method": method, **params}
+        self._waiter.set_result(None)
+        return True
+
+    def close(self) -> None:
+        if not self._waiter.done():
+            self._waiter.set_result(None)
+
+    async def watch(self, aw: Awaitable[Any]) -> Any:
+        """
+        Await the handler, closing the slot when it's done
+        """
+        try:
+            return await aw
+        finally:
+            self.close()
+
+    async def wait(self, timeout: float) -> dict[str, Any] | None:
+        """
+        Wait for a call up to ``timeout`` seconds, the slot is closed after
+        """
+        try:
+            await asyncio.wait_for(asyncio.shield(self._waiter), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self.close()
+        return self.call
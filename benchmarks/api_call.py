@@ -0,0 +1,58 @@
+"""
+Fixed overhead of an awaited API call: a Task per call (what api_call used
+to do) against the inline fast path. The session answers immediately, so
+only the call machinery is measured.
+
+    python -m benchmarks.api_call
+"""
+
+import asyncio
+import time
+from typing import Any, cast
+
+import aiohttp
+
+from aiotg import Bot
+
+N = 50000
+
+
+class Response:
+    status = 200
+
+    async def read(self) -> bytes:
+        return b'{"ok": true, "result": true}'
+
+
+class Session:
+    closed = False
+
+    async def post(self, url: str, **kwargs: Any) -> Response:
+        return Response()
+
+
+async def bench(bot: Bot) -> None:
+    params = {"chat_id": 1, "text": "hi"}
+
+    start = time.perf_counter()
+    for _ in range(N):
+        await asyncio.ensure_future(bot._api_call("sendMessage", **params))
+    task = (time.perf_counter() - start) / N
+
+    start = time.perf_counter()
+    for _ in range(N):
+        await bot.api_call("sendMessage", **params)
+    inline = (time.perf_counter() - start) / N
+
+    print(f"task per call  {task * 1e6:6.2f} us")
+    print(f"fast path      {inline * 1e6:6.2f} us")
+
+
+def main() -> None:
+    bot = Bot("token")
+    bot._session = cast(aiohttp.ClientSession, Session())
+    asyncio.run(bench(bot))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Time to find the handler of a message that no command matches, the worst
+case for dispatch: CommandRouter against re.search over every pattern in
+registration order (what add_command used to do).
+
+    python -m benchmarks.router
+"""
+
+import re
+import timeit
+
+from aiotg.router import CommandRouter
+
+ROUTES = 200
+N = 2000
+TEXT = "just a regular message in a group chat, " * 4
+
+
+def bench(name: str, patterns: list[str]) -> None:
+    router = CommandRouter()
+    for pattern in patterns:
+        router.add(pattern, pattern)
+    regexes = [re.compile(pattern, re.I) for pattern in patterns]
+
+    def search() -> None:
+        for regex in regexes:
+            if regex.search(TEXT):
+                return
+
+    plain = timeit.timeit(search, number=N) / N
+    routed = timeit.timeit(lambda: router.match(TEXT), number=N) / N
+    print(f"{name:<12} re.search {plain * 1e6:8.1f} us   router {routed * 1e6:8.1f} us")
+
+
+def main() -> None:
+    bench("/cmdN (.+)", [rf"/cmd{i} (.+)" for i in range(ROUTES)])
+    bench("^/cmdN", [rf"^/cmd{i}" for i in range(ROUTES)])
+    bench("^/cmdN (.+)", [rf"^/cmd{i} (.+)" for i in range(ROUTES)])
+
+
+if __name__ == "__main__":
+    main()
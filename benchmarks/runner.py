@@ -0,0 +1,44 @@
+"""
+Memory per bot polled by PollingRunner, against the resident memory of a
+process that only imports aiotg, which is the least a bot per process
+costs. Bots are started with a long stagger, so nothing goes out.
+
+    python -m benchmarks.runner
+"""
+
+import asyncio
+import tracemalloc
+
+from aiotg import Bot
+from aiotg.runner import PollingRunner
+
+BOTS = 40
+
+
+def rss() -> int:
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+async def per_bot() -> float:
+    tracemalloc.start()
+    bots = [Bot(f"{i}:token") for i in range(BOTS)]
+    runner = PollingRunner(bots, stagger=3600)
+    await runner.start()
+    used, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    await runner.stop()
+    return used / BOTS
+
+
+def main() -> None:
+    baseline = rss()
+    print(f"bot in runner      {asyncio.run(per_bot()) / 1024:8.1f} KiB")
+    print(f"process baseline   {baseline / 1024:8.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Memory per tenant of WebhookHost with update dedup and rate limiting on,
+compared to a full Bot per token, and webhook request throughput through
+the host. Handlers reply through a session that answers immediately.
+
+    python -m benchmarks.webhook_host
+"""
+
+import asyncio
+import json
+import re
+import time
+import tracemalloc
+from typing import Any, cast
+
+import aiohttp
+from aiohttp import web
+
+from aiotg import Bot, Chat
+from aiotg.bot import SECRET_HEADER
+from aiotg.dedup import UpdateDedup
+from aiotg.host import WebhookHost
+from aiotg.ratelimit import RateLimiter
+
+TENANTS = 10000
+REQUESTS = 20000
+
+
+class Request:
+    def __init__(self, bot_id: str, secret: str) -> None:
+        self.match_info = {"bot_id": bot_id}
+        self.headers = {SECRET_HEADER: secret}
+        self.body = json.dumps(
+            {
+                "update_id": 1,
+                "message": {
+                    "message_id": 1,
+                    "from": {"id": 5, "first_name": "John"},
+                    "chat": {"id": 5, "type": "private"},
+                    "date": 0,
+                    "text": "/start",
+                },
+            }
+        ).encode()
+
+    async def read(self) -> bytes:
+        return self.body
+
+
+class Response:
+    status = 200
+
+    async def read(self) -> bytes:
+        return b'{"ok":true,"result":{}}'
+
+
+class Session:
+    closed = False
+
+    async def post(self, url: str, **kwargs: Any) -> Response:
+        return Response()
+
+
+def per_tenant(tokens: list[str]) -> tuple[float, float]:
+    bot = Bot("0:base", dedup=UpdateDedup(), rate_limiter=RateLimiter())
+    tracemalloc.start()
+    host = WebhookHost(bot)
+    for token in tokens:
+        host.add(token, secret=token)
+    hosted, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    bots = [Bot(token) for token in tokens]
+    full, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del bots
+    return hosted / len(tokens), full / len(tokens)
+
+
+async def throughput(tokens: list[str]) -> float:
+    bot = Bot("0:base")
+    bot._session = cast(aiohttp.ClientSession, Session())
+
+    @bot.command(r"/start")
+    async def start(chat: Chat, match: re.Match[str]) -> None:
+        await chat.send_text("hi")
+
+    host = WebhookHost(bot)
+    requests = []
+    for token in tokens:
+        tenant = host.add(token, secret=token)
+        requests.append(Request(host.bot_id(token), tenant._webhook_uuid or ""))
+
+    start_time = time.perf_counter()
+    for i in range(REQUESTS):
+        await host.handle(cast(web.Request, requests[i % len(requests)]))
+    await bot.scheduler.join()
+    return REQUESTS / (time.perf_counter() - start_time)
+
+
+def main() -> None:
+    tokens = [f"{100000 + i}:token{i:030d}" for i in range(TENANTS)]
+    hosted, full = per_tenant(tokens)
+    print(f"tenant in host  {hosted:8.0f} bytes")
+    print(f"full Bot        {full:8.0f} bytes")
+    print(f"requests/s      {asyncio.run(throughput(tokens)):8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Allocations per update made by the update wrappers: Chat, Sender and the
+query objects. Wrappers are kept alive like handlers waiting on I/O would.
+
+    python -m benchmarks.wrappers
+"""
+
+import gc
+import sys
+import tracemalloc
+from typing import Any, Callable
+
+from aiotg import Bot, Chat, InlineQuery
+from aiotg.bot import CallbackQuery, PreCheckoutQuery
+
+N = 10000
+
+sender = {"id": 123, "is_bot": False, "first_name": "John", "username": "john"}
+message = {
+    "message_id": 1,
+    "from": sender,
+    "chat": {"id": 123, "type": "private"},
+    "date": 0,
+    "text": "/start",
+}
+callback_query = {"id": "1", "from": sender, "message": message, "data": "click"}
+inline_query = {"id": "1", "from": sender, "query": "cats", "offset": ""}
+pre_checkout_query = {
+    "id": "1",
+    "from": sender,
+    "currency": "USD",
+    "total_amount": 100,
+    "invoice_payload": "payload",
+}
+
+
+def measure(make: Callable[[], Any]) -> tuple[float, float, float]:
+    keep = [None] * N
+    gc.collect()
+    gc.disable()
+    try:
+        objects = len(gc.get_objects())
+        blocks = sys.getallocatedblocks()
+        tracemalloc.start()
+        for i in range(N):
+            keep[i] = make()
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        blocks = sys.getallocatedblocks() - blocks
+        objects = len(gc.get_objects()) - objects
+    finally:
+        gc.enable()
+    return blocks / N, size / N, objects / N
+
+
+def main() -> None:
+    bot = Bot("token")
+    cases: dict[str, Callable[[], Any]] = {
+        "message": lambda: Chat.from_message(bot, message),
+        "callback_query": lambda: (
+            Chat.from_message(bot, message),
+            CallbackQuery(bot, callback_query),
+        ),
+        "inline_query": lambda: InlineQuery(bot, inline_query),
+        "pre_checkout_query": lambda: PreCheckoutQuery(bot, pre_checkout_query),
+    }
+    print(f"{'update':<20}{'blocks':>10}{'bytes':>10}{'gc objects':>12}")
+    for name, make in cases.items():
+        blocks, size, objects = measure(make)
+        print(f"{name:<20}{blocks:>10.1f}{size:>10.0f}{objects:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,3 @@
-import json
 import os
 from aiotg import Bot
 
@@ -32,7 +31,7 @@ def start(chat, match):
         ],
     }
 
-    chat.send_text("Hello", reply_markup=json.dumps(markup))
+    chat.send_text("Hello", reply_markup=markup)
 
 
 @bot.callback(r"buttonclick-(\w+)")
@@ -0,0 +1,115 @@
+"""
+Fakes shared by the tests: Telegram updates, webhook requests and an
+aiohttp session answering API calls without a network
+"""
+
+import json
+from typing import Any
+
+from aiotg.bot import SECRET_HEADER
+
+
+def message_update(text: str, update_id: int = 1, chat_id: int = 1) -> Any:
+    """Update with a text message in a private chat"""
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "from": {"id": chat_id, "first_name": "John"},
+            "chat": {"id": chat_id, "type": "private"},
+            "date": 0,
+            "text": text,
+        },
+    }
+
+
+class FakeResponse:
+    def __init__(self, status: int = 200, body: Any = None) -> None:
+        self.status = status
+        self.headers = {"content-type": "application/json"}
+        self.body = {"ok": True, "result": {}} if body is None else body
+
+    async def __aenter__(self) -> "FakeResponse":
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        pass
+
+    async def read(self) -> bytes:
+        return json.dumps(self.body).encode()
+
+    async def release(self) -> None:
+        pass
+
+
+def ok_response(result: Any = True) -> FakeResponse:
+    return FakeResponse(200, {"ok": True, "result": result})
+
+
+def error_response(status: int, description: str, **parameters: Any) -> FakeResponse:
+    body: dict[str, Any] = {"ok": False, "description": description}
+    if parameters:
+        body["parameters"] = parameters
+    return FakeResponse(status, body)
+
+
+class FakeSession:
+    """
+    Stands in for aiohttp.ClientSession. Posts get the given responses in
+    order, exceptions among them are raised, then ``{"ok": true}`` ones.
+    Override :meth:`respond` to answer depending on the request.
+    """
+
+    def __init__(self, *responses: FakeResponse | Exception) -> None:
+        self.responses = list(responses)
+        self.closed = False
+        self.requests: list[tuple[str, dict[str, Any]]] = []
+        self.methods: list[str] = []
+
+    @property
+    def calls(self) -> int:
+        return len(self.requests)
+
+    @property
+    def sent(self) -> list[Any]:
+        """Decoded parameters of the calls made"""
+        return [json.loads(kwargs["data"]) for _, kwargs in self.requests]
+
+    @property
+    def timeouts(self) -> list[Any]:
+        return [kwargs["timeout"] for _, kwargs in self.requests]
+
+    async def post(self, url: str, **kwargs: Any) -> FakeResponse:
+        method = url.rsplit("/", 1)[-1]
+        self.requests.append((url, kwargs))
+        self.methods.append(method)
+        response = await self.respond(method, json.loads(kwargs.get("data") or "{}"))
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    async def respond(
+        self, method: str, params: dict[str, Any]
+    ) -> FakeResponse | Exception:
+        if self.responses:
+            return self.responses.pop(0)
+        return FakeResponse()
+
+    def head(self, url: str, **kwargs: Any) -> FakeResponse:
+        self.methods.append("HEAD")
+        return FakeResponse()
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+class FakeRequest:
+    """Webhook request from Telegram"""
+
+    def __init__(self, update: Any, secret: str, bot_id: str | None = None) -> None:
+        self.match_info = {"bot_id": bot_id} if bot_id else {}
+        self.headers = {SECRET_HEADER: secret}
+        self.body = json.dumps(update).encode()
+
+    async def read(self) -> bytes:
+        return self.body
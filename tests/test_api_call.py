@@ -0,0 +1,93 @@
+import asyncio
+from typing import Any, cast
+
+import aiohttp
+import pytest
+
+from aiotg.bot import Bot, BotApiError
+
+from conftest import FakeResponse, FakeSession, error_response, ok_response
+
+
+def make_bot(*responses: FakeResponse) -> Bot:
+    bot = Bot("test_token")
+    bot._session = cast(aiohttp.ClientSession, FakeSession(*responses))
+    return bot
+
+
+def test_awaited_call_runs_inline() -> None:
+    ok = ok_response()
+    bot = make_bot(ok, ok, ok)
+    session = cast(FakeSession, bot.session)
+
+    async def main() -> None:
+        tasks = len(asyncio.all_tasks())
+        call = bot.api_call("getMe")
+        assert await call == {"ok": True, "result": True}
+        assert len(asyncio.all_tasks()) == tasks
+
+        # Not awaited, still sent
+        bot.api_call("getMe")
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        assert session.calls == 2
+
+        # Future API on demand
+        done = asyncio.Event()
+        bot.api_call("getMe").add_done_callback(lambda _: done.set())
+        await asyncio.wait_for(done.wait(), 1)
+
+    asyncio.run(main())
+    assert session.calls == 3
+
+
+def test_awaited_call_acts_like_a_task() -> None:
+    ok = ok_response({"id": 1})
+    forbidden = error_response(403, "Blocked")
+    tasks: list[int] = []
+
+    class Session(FakeSession):
+        async def respond(
+            self, method: str, params: dict[str, Any]
+        ) -> FakeResponse | Exception:
+            tasks.append(len(asyncio.all_tasks()))
+            return await super().respond(method, params)
+
+    bot = Bot("test_token")
+    bot._session = cast(aiohttp.ClientSession, Session(ok, forbidden, ok))
+
+    async def main() -> None:
+        call = bot.api_call("getMe")
+        assert await call == {"ok": True, "result": {"id": 1}}
+        assert await call == call.result() == {"ok": True, "result": {"id": 1}}
+
+        call = bot.api_call("sendMessage")
+        with pytest.raises(BotApiError):
+            await call
+        with pytest.raises(BotApiError):
+            await call
+        assert isinstance(call.exception(), BotApiError)
+
+        # gather runs the call in a task of its own, not in two
+        (result,) = await asyncio.gather(bot.api_call("getMe"))
+        assert result["ok"]
+
+    asyncio.run(main())
+    assert tasks == [1, 1, 2]
+
+
+def test_fire_and_forget() -> None:
+    ok = ok_response({"message_id": 1})
+    forbidden = error_response(403, "Blocked")
+    bot = make_bot(ok, forbidden)
+    errors: list[tuple[str, Exception]] = []
+    bot.on_api_error(lambda method, error: errors.append((method, error)))
+
+    async def main() -> None:
+        assert await bot.api_call("sendMessage", fire_and_forget=True) is None
+        bot.send_message(1, "hi", fire_and_forget=True)
+        for _ in range(3):
+            await asyncio.sleep(0)
+
+    asyncio.run(main())
+    assert [(m, type(e)) for m, e in errors] == [("sendMessage", BotApiError)]
@@ -1,3 +1,4 @@
+import asyncio
 import random
 import re
 from typing import Any, Literal, NewType, cast
@@ -184,6 +185,33 @@ def test_message_updates(upd_type: str) -> None:
     assert called_with == "foo bar"
 
 
+def test_callback_query_update() -> None:
+    update: TG_Update = {"update_id": 0, "callback_query": callback_query("click")}
+    called_with: str | None = None
+
+    @bot.callback
+    def _(_chat: Chat | None, cq: CallbackQuery) -> None:
+        nonlocal called_with
+        called_with = cq.data
+
+    bot._process_update(update)
+    assert called_with == "click"
+
+
+def test_update_handler() -> None:
+    bot = Bot(API_TOKEN)
+    update = cast(TG_Update, {"update_id": 0, "poll_answer": {"poll_id": "1"}})
+    called_with: Any = None
+
+    @bot.update_handler("poll_answer")
+    def _(answer: Any) -> None:
+        nonlocal called_with
+        called_with = answer
+
+    bot._process_update(update)
+    assert called_with == {"poll_id": "1"}
+
+
 def test_updates_failed() -> None:
     updates: TG_Response_Failure = {"ok": False, "description": "Opps"}
 
@@ -207,6 +235,22 @@ def test_handle(mt: str):
     assert called_with == value
 
 
+def test_handle_precedence() -> None:
+    bot = Bot(API_TOKEN)
+    called: list[str] = []
+
+    @bot.handle("venue")
+    def _(_chat: Chat, _venue: Any) -> None:
+        called.append("venue")
+
+    @bot.handle("location")
+    def _(_chat: Chat, _location: Any) -> None:
+        called.append("location")
+
+    bot._process_message(custom_msg({"venue": {}, "location": {}}))
+    assert called == ["location"]
+
+
 @pytest.mark.parametrize(
     "ctype,id", [("channel", "@foobar"), ("private", "111111"), ("group", "222222")]
 )
@@ -290,7 +334,7 @@ def test_inline_answer():
     ]
     iq.answer(results)
     assert "answerInlineQuery" in bot.calls
-    assert isinstance(bot.calls["answerInlineQuery"]["results"], str)
+    assert bot.calls["answerInlineQuery"]["results"] == results
 
 
 def test_edit_message():
@@ -318,9 +362,114 @@ def test_edit_reply_markup():
     chat.edit_reply_markup(message_id, markup)
     assert "editMessageReplyMarkup" in bot.calls
     call = bot.calls["editMessageReplyMarkup"]
-    assert (
-        call["reply_markup"]
-        == '{"inline_keyboard": [[{"text": "ok"}, {"text": "cancel"}]]}'
-    )
-    # assert call["reply_markup"] == '{"inline_keyboard": [["ok", "cancel"]]}'
+    assert call["reply_markup"] == markup
     assert call["message_id"] == message_id
+
+
+def test_lazy_sender() -> None:
+    chat = Chat.from_message(bot, text_msg("hi"))
+    assert not hasattr(chat, "__dict__")
+    assert chat._sender is None
+    assert repr(chat.sender) == "John"
+    assert chat.sender is chat.sender
+    assert repr(Chat(bot, 1).sender) == "N/A"
+
+    iq = InlineQuery(bot, inline_query("cats"))
+    assert iq._sender is None
+    assert iq.sender["id"] == 123
+
+
+def test_update_lane() -> None:
+    assert Bot._update_lane(text_msg("hi")) == 0
+    assert Bot._update_lane(callback_query("click")) == 0
+    assert Bot._update_lane(inline_query("query")) == 123
+    assert Bot._update_lane({"poll_id": "1"}) is None
+
+
+def test_pipelined_loop() -> None:
+    batches: list[list[TG_Update]] = [
+        [{"update_id": 1, "message": text_msg("one")}],
+        [{"update_id": 2, "message": text_msg("two")}],
+    ]
+    events: list[str] = []
+
+    class PollingBot(Bot):
+        def api_call(self, method: str, **params: Any) -> Any:
+            assert params["limit"] == 10
+            events.append("getUpdates offset=%d" % params["offset"])
+            if not batches:
+                self.stop()
+            result = batches.pop(0) if batches else []
+            future: asyncio.Future[Any] = asyncio.Future()
+            future.set_result({"ok": True, "result": result})
+            return future
+
+    bot = PollingBot(API_TOKEN)
+
+    @bot.default
+    def _(_chat: Chat, message: TG_Message) -> None:
+        events.append("handle %s" % message.get("text"))
+
+    asyncio.run(bot.loop(limit=10, pipeline=True))
+    assert events == [
+        "getUpdates offset=1",
+        "getUpdates offset=2",
+        "handle one",
+        "getUpdates offset=3",
+        "handle two",
+    ]
+
+
+def test_allowed_updates() -> None:
+    bot = MockBot()
+    assert bot.allowed_updates() == []
+
+    bot.callback(r"click-(\w+)")(lambda chat, cq, match: None)
+    assert bot.allowed_updates() == ["callback_query"]
+
+    bot.add_command(r"/echo (.+)", lambda chat, match: None)
+    bot.add_update_handler("poll_answer", lambda answer: None)
+    assert bot.allowed_updates() == [
+        "message",
+        "edited_message",
+        "channel_post",
+        "edited_channel_post",
+        "callback_query",
+        "poll_answer",
+    ]
+
+    bot.set_webhook(webhook_url="https://example.com/hook")
+    assert bot.calls["setWebhook"]["allowed_updates"] == bot.allowed_updates()
+
+
+def test_allowed_member_updates() -> None:
+    bot = MockBot()
+    member = {"user": {"id": 1, "first_name": "John"}, "status": "member"}
+    called_with: Any = None
+
+    @bot.handle("new_chat_member")
+    def _(_chat: Chat, new_member: Any) -> None:
+        nonlocal called_with
+        called_with = new_member
+
+    # The handler gets service messages and chat member updates alike
+    assert bot.allowed_updates() == [
+        "message",
+        "edited_message",
+        "channel_post",
+        "edited_channel_post",
+        "chat_member",
+        "my_chat_member",
+    ]
+    update = {
+        "update_id": 0,
+        "my_chat_member": {
+            "chat": {"id": 1, "type": "group"},
+            "from": {"id": 2, "first_name": "Jane"},
+            "date": 0,
+            "old_chat_member": {**member, "status": "left"},
+            "new_chat_member": member,
+        },
+    }
+    bot._process_update(cast(TG_Update, update))
+    assert called_with == member
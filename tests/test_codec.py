@@ -0,0 +1,66 @@
+import asyncio
+import json
+from typing import cast
+
+import aiohttp
+import pytest
+
+from aiotg import codec
+from aiotg.bot import Bot
+from aiotg.codec import JsonCodec, MsgspecCodec, OrjsonCodec, detect_codec
+
+from conftest import FakeSession, ok_response
+
+payload = {"chat_id": 1, "text": "привет", "reply_markup": {"keyboard": [["ok"]]}}
+
+
+@pytest.mark.parametrize("name", ["json", "orjson", "msgspec"])
+def test_roundtrip(name: str) -> None:
+    if name != "json":
+        pytest.importorskip(name)
+    c = {"json": JsonCodec, "orjson": OrjsonCodec, "msgspec": MsgspecCodec}[name]()
+
+    body = c.encode(payload)
+    assert isinstance(body, bytes)
+    assert json.loads(body) == payload
+    assert c.decode(body) == payload
+    assert json.loads(c.dumps(payload)) == payload
+
+
+def test_detect_codec(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(codec, "orjson", None)
+    monkeypatch.setattr(codec, "msgspec", None)
+    assert detect_codec().name == "json"
+
+
+def test_custom_functions() -> None:
+    bot = Bot("test_token", json_deserialize=lambda data: {"custom": True})
+    assert bot.codec.name == "json"
+    assert bot.json_deserialize(b"{}") == {"custom": True}
+
+
+def test_bytes_body() -> None:
+    bot = Bot("test_token")
+    session = FakeSession(ok_response({"message_id": 1}))
+    bot._session = cast(aiohttp.ClientSession, session)
+
+    result = asyncio.run(bot._api_call("sendMessage", **payload))
+    assert result["result"] == {"message_id": 1}
+    _, kwargs = session.requests[-1]
+    assert isinstance(kwargs["data"], bytes)
+    assert session.sent == [payload]
+    assert kwargs["headers"]["Content-Type"] == "application/json"
+
+
+def test_nested_fields_encoded_once() -> None:
+    bot = Bot("test_token")
+    session = FakeSession()
+    bot._session = cast(aiohttp.ClientSession, session)
+    results = [{"type": "article", "id": "1", "title": '"quoted"'}]
+
+    asyncio.run(bot._api_call("answerInlineQuery", results=results))
+    assert session.sent[-1]["results"] == results
+
+    # Pre-serialized strings from older code are passed through
+    asyncio.run(bot._api_call("answerInlineQuery", results=json.dumps(results)))
+    assert session.sent[-1]["results"] == json.dumps(results)
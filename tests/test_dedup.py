@@ -0,0 +1,55 @@
+import asyncio
+import re
+from pathlib import Path
+
+from aiotg import Bot, Chat
+from aiotg.dedup import FileDedupBackend, UpdateDedup
+
+from conftest import message_update
+
+
+def test_window() -> None:
+    dedup = UpdateDedup(size=3)
+    seen = [dedup.seen(update_id) for update_id in (1, 2, 1, 3, 4)]
+    assert seen == [False, False, True, False, False]
+    # 1 left the window when 4 came in
+    assert 1 not in dedup and 4 in dedup
+    assert dedup.stats() == {"hits": 1, "tracked": 3}
+
+
+def test_duplicate_updates_dropped() -> None:
+    bot = Bot("token", dedup=UpdateDedup())
+    payments: list[int] = []
+
+    @bot.command(r"/pay")
+    async def pay(chat: Chat, match: re.Match[str]) -> None:
+        payments.append(chat.id)
+
+    async def main() -> None:
+        for update_id in (10, 11, 10, 11, 12):
+            bot._process_update(message_update("/pay", update_id))
+        await bot.scheduler.join()
+
+    asyncio.run(main())
+    assert len(payments) == 3
+    assert bot._offset == 12
+    assert bot.dedup is not None and bot.dedup.hits == 2
+
+
+def test_file_backend(tmp_path: Path) -> None:
+    path = str(tmp_path / "seen")
+    dedup = UpdateDedup(size=3, backend=FileDedupBackend(path))
+    for update_id in range(1, 10):
+        dedup.seen(update_id)
+    assert dedup.backend is not None
+    dedup.backend.close()
+    # Rewritten down to the window along the way
+    assert len(Path(path).read_text().split()) < 6
+
+    # A torn last line is skipped on restart
+    with open(path, "a") as f:
+        f.write("1")
+    restarted = UpdateDedup(size=3, backend=FileDedupBackend(path))
+    assert restarted.seen(9) and restarted.seen(8) and restarted.seen(7)
+    assert not restarted.seen(6)
+    assert Path(path).read_text().split()[-3:] == ["8", "9", "6"]
@@ -0,0 +1,142 @@
+import asyncio
+import re
+from typing import Any, cast
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+from aiotg import Bot, Chat
+from aiotg.dedup import DedupBackend, UpdateDedup
+from aiotg.host import WebhookHost
+from aiotg.ratelimit import RateLimiter
+from aiotg.scheduler import UpdateScheduler
+
+from conftest import FakeRequest, FakeSession, message_update
+
+
+def make_host() -> tuple[WebhookHost, FakeSession]:
+    bot = Bot("0:base")
+    session = FakeSession()
+    bot._session = cast(aiohttp.ClientSession, session)
+
+    @bot.command(r"/start")
+    async def start(chat: Chat, match: re.Match[str]) -> None:
+        await chat.send_text("hi")
+
+    return WebhookHost(bot), session
+
+
+def handle(host: WebhookHost, *requests: FakeRequest) -> list[int]:
+    async def main() -> list[int]:
+        statuses = []
+        for request in requests:
+            response = await host.handle(cast(web.Request, request))
+            statuses.append(response.status)
+        await host.bot.scheduler.join()
+        return statuses
+
+    return asyncio.run(main())
+
+
+def test_routing() -> None:
+    host, session = make_host()
+    first = host.add("111:aaa", secret="s1")
+    host.add("222:bbb", secret="s2")
+    assert len(host) == 2
+    assert host.webhook_url(first, "https://example.com/") == (
+        "https://example.com/webhook/111"
+    )
+
+    statuses = handle(
+        host,
+        FakeRequest(message_update("/start"), "s1", "111"),
+        FakeRequest(message_update("/start"), "s2"),
+    )
+    assert statuses == [200, 200]
+    # Replies go out with the token of the bot the update came to
+    tokens = [url.split("/")[-2] for url, _ in session.requests]
+    assert tokens == ["bot111:aaa", "bot222:bbb"]
+
+
+def test_bad_secrets() -> None:
+    host, session = make_host()
+    host.add("111:aaa", secret="s1")
+
+    statuses = handle(
+        host,
+        FakeRequest(message_update("/start"), "s2", "111"),
+        FakeRequest(message_update("/start"), "s1", "333"),
+        FakeRequest(message_update("/start"), "nope"),
+    )
+    assert statuses == [403, 403, 403]
+    assert not session.requests
+
+    host.remove("111:aaa")
+    assert handle(host, FakeRequest(message_update("/start"), "s1")) == [403]
+
+
+def test_tenant_limits_and_lanes() -> None:
+    host, _ = make_host()
+    host.bot.rate_limiter = RateLimiter()
+    host.bot.scheduler = UpdateScheduler(ordered=True)
+    first, second = host.add("111:aaa"), host.add("222:bbb")
+
+    # Telegram limits are per bot, so is the limiter state
+    assert first.rate_limiter is not second.rate_limiter
+    assert first.rate_limiter is not host.bot.rate_limiter
+    assert first.rate_limiter is not None
+    assert first.rate_limiter.global_limit == host.bot.rate_limiter.global_limit
+
+    # The same user talks to both bots in two different chats
+    payload = {"chat": {"id": 5}}
+    assert first._scheduler_lane(payload) != second._scheduler_lane(payload)
+
+
+def test_tenant_dedup_and_state() -> None:
+    host, session = make_host()
+    stored: list[int] = []
+
+    class Backend(DedupBackend):
+        def add(self, update_id: int) -> None:
+            stored.append(update_id)
+
+    host.bot.dedup = UpdateDedup(backend=Backend())
+    host.bot.at_least_once = True
+    first, second = host.add("111:aaa", secret="s1"), host.add("222:bbb", secret="s2")
+
+    statuses = handle(
+        host,
+        FakeRequest(message_update("/start", 7), "s1"),
+        FakeRequest(message_update("/start", 7), "s2"),
+        # Telegram retrying the webhook
+        FakeRequest(message_update("/start", 7), "s1"),
+    )
+    assert statuses == [200, 200, 200]
+    assert session.calls == 2
+    # One window and backend for all tenants, ids told apart by bot id
+    assert host.bot.dedup.hits == 1 and len(host.bot.dedup) == 2
+    assert stored == [111 << 32 | 7, 222 << 32 | 7]
+
+    assert first._unsettled is not host.bot._unsettled
+    assert first.scheduler is host.bot.scheduler
+    with pytest.raises(AttributeError):
+        second.offset_store
+
+
+def test_tenant_webhook_and_close() -> None:
+    host, session = make_host()
+    tenant = host.add("111:aaa", secret="s1")
+
+    async def main(**options: Any) -> None:
+        await tenant.set_webhook("https://example.com/webhook", **options)
+        await tenant.close()
+
+    asyncio.run(main())
+    assert tenant._webhook_uuid == "s1"
+    assert not session.closed
+    assert handle(host, FakeRequest(message_update("/start"), "s1")) == [200]
+
+    asyncio.run(main(secret_token="s2"))
+    assert handle(host, FakeRequest(message_update("/start"), "s1")) == [403]
+    assert handle(host, FakeRequest(message_update("/start"), "s2")) == [200]
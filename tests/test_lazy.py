@@ -0,0 +1,66 @@
+import asyncio
+import json
+from typing import Any
+
+import pytest
+
+from aiotg import Chat
+from aiotg.mock import MockBot
+
+msgspec = pytest.importorskip("msgspec")
+
+from aiotg.lazy import LazyCodec, LazyDict  # noqa: E402
+
+message = {
+    "message_id": 1,
+    "from": {"id": 123, "is_bot": False, "first_name": "John"},
+    "chat": {"id": 123, "type": "private"},
+    "date": 0,
+    "photo": [{"file_id": "a", "file_unique_id": "b", "width": 1, "height": 1}],
+    "reply_to_message": {"message_id": 0, "date": 0, "chat": {"id": 123}},
+    "not_in_types": True,
+}
+update = {"update_id": 7, "message": message}
+
+
+def test_lazy_fields() -> None:
+    msg = LazyCodec().decode_update(json.dumps(update))["message"]
+    assert isinstance(msg, LazyDict)
+
+    # Routing fields are decoded upfront, the rest stays raw until used
+    assert dict.__getitem__(msg, "chat") == {"id": 123, "type": "private"}
+    assert isinstance(dict.__getitem__(msg, "photo"), msgspec.Raw)
+    assert "photo" in msg and "text" not in msg
+
+    assert msg["photo"][0]["file_id"] == "a"
+    assert isinstance(dict.__getitem__(msg, "photo"), list)
+    assert msg.get("reply_to_message")["message_id"] == 0
+    assert msg == message
+    assert dict(msg) == message
+
+
+def test_lazy_updates_response() -> None:
+    codec = LazyCodec()
+    body = json.dumps({"ok": True, "result": [update]}).encode()
+    updates = codec.decode_updates(body)
+    assert updates["ok"]
+    assert updates["result"][0]["update_id"] == 7
+    assert json.loads(codec.encode(updates["result"][0])) == update
+
+
+def test_handlers_get_lazy_messages() -> None:
+    bot = MockBot(codec=LazyCodec())
+    photos: Any = None
+
+    @bot.handle("photo")
+    def photo(chat: Chat, photo: Any) -> None:
+        nonlocal photos
+        photos = photo
+        assert chat.sender["first_name"] == "John"
+
+    async def main() -> None:
+        bot._process_update(bot.codec.decode_update(json.dumps(update)))
+        await bot.scheduler.join()
+
+    asyncio.run(main())
+    assert photos == message["photo"]
@@ -0,0 +1,195 @@
+import asyncio
+import re
+from pathlib import Path
+from typing import Any, cast
+
+import aiohttp
+import pytest
+
+from aiotg import Bot, Chat
+from aiotg.dedup import FileDedupBackend, UpdateDedup
+from aiotg.offsets import FileOffsetStore, OffsetStore
+
+from conftest import FakeResponse, FakeSession, message_update, ok_response
+
+
+class PollSession(FakeSession):
+    """Answers polls with batches of updates, stops the bot after the last"""
+
+    def __init__(self, bot: Bot, *batches: list[int]) -> None:
+        super().__init__()
+        self.bot = bot
+        self.batches = list(batches)
+        self.offsets: list[int] = []
+        self.on_poll: dict[int, Any] = {}
+
+    async def respond(
+        self, method: str, params: dict[str, Any]
+    ) -> FakeResponse | Exception:
+        if method != "getUpdates":
+            return await super().respond(method, params)
+        self.offsets.append(params["offset"])
+        callback = self.on_poll.get(len(self.offsets))
+        if callback is not None:
+            callback()
+        if not self.batches:
+            self.bot.stop()
+            return ok_response([])
+        ids = self.batches.pop(0)
+        return ok_response([update(i) for i in ids])
+
+
+class MemoryStore(OffsetStore):
+    def __init__(self, offset: int = 0) -> None:
+        self.offset = offset
+        self.saves: list[int] = []
+
+    def load(self) -> int:
+        return self.offset
+
+    def save(self, offset: int) -> None:
+        self.saves.append(offset)
+
+
+def update(update_id: int) -> Any:
+    return message_update("/slow" if update_id == 5 else "/fast", update_id)
+
+
+def test_file_store(tmp_path: Path) -> None:
+    path = tmp_path / "offset"
+    store = FileOffsetStore(str(path), flush_every=10, flush_interval=3600)
+    assert store.load() == 0
+
+    store.save(5)
+    assert not path.exists()
+    store.save(12)
+    assert path.read_text() == "12\n"
+    store.save(15)
+    store.flush()
+    assert path.read_text() == "15\n"
+    assert not (tmp_path / "offset.tmp").exists()
+    assert FileOffsetStore(str(path)).load() == 15
+
+
+def test_resume_from_stored_offset() -> None:
+    store = MemoryStore(41)
+    bot = Bot("token", offset_store=store)
+    session = PollSession(bot, [42, 43])
+    bot._session = cast(aiohttp.ClientSession, session)
+
+    asyncio.run(bot.loop())
+    assert session.offsets == [42, 44]
+    assert store.saves[-1] == 43
+
+
+def test_at_least_once() -> None:
+    store = MemoryStore()
+    bot = Bot("token", offset_store=store, at_least_once=True)
+    session = PollSession(bot, [5], [5, 6], [5, 6], [5, 6])
+    bot._session = cast(aiohttp.ClientSession, session)
+    handled: list[str] = []
+
+    async def main() -> None:
+        release = asyncio.Event()
+
+        @bot.command(r"/(slow|fast)")
+        async def handle(chat: Chat, match: re.Match[str]) -> None:
+            if match.group(1) == "slow":
+                await release.wait()
+            handled.append(match.group(1))
+
+        # Update 5 finishes after the third poll, 6 is done by then
+        session.on_poll[3] = lambda: asyncio.get_running_loop().call_later(
+            0.01, release.set
+        )
+        await bot.loop()
+
+    asyncio.run(main())
+    # Polling stays at update 5 until its handler is done
+    assert session.offsets == [1, 5, 5, 5, 7]
+    assert handled == ["fast", "slow"]
+    assert store.saves[0] == 4 and store.saves[-1] == 6
+    assert bot.dedup is not None and bot.dedup.hits == 5
+
+
+def test_cancelled_handler(caplog: pytest.LogCaptureFixture) -> None:
+    bot = Bot("token", at_least_once=True)
+    session = PollSession(bot, [5], [5])
+    bot._session = cast(aiohttp.ClientSession, session)
+
+    async def main() -> None:
+        @bot.command(r"/slow")
+        async def slow(chat: Chat, match: re.Match[str]) -> None:
+            await asyncio.Event().wait()
+
+        def cancel() -> None:
+            for task in list(bot.scheduler._tasks):
+                task.cancel()
+
+        # Once the handler has started
+        session.on_poll[2] = lambda: asyncio.get_running_loop().call_soon(cancel)
+        await bot.loop()
+
+    asyncio.run(main())
+    # Polling doesn't stay at update 5 once its handler is gone
+    assert session.offsets == [1, 5, 6]
+    assert "Handler of update 5 was cancelled" in caplog.text
+
+
+def test_settle_timeout(caplog: pytest.LogCaptureFixture) -> None:
+    bot = Bot("token", at_least_once=True)
+    bot.settle_timeout = 0
+    session = PollSession(bot, [5])
+    bot._session = cast(aiohttp.ClientSession, session)
+
+    async def main() -> None:
+        @bot.command(r"/slow")
+        async def slow(chat: Chat, match: re.Match[str]) -> None:
+            await asyncio.Event().wait()
+
+        await bot.loop()
+
+    asyncio.run(main())
+    assert session.offsets == [1, 6]
+    assert "Update 5 is still being handled" in caplog.text
+
+
+def test_at_least_once_with_persistent_dedup(tmp_path: Path) -> None:
+    path = str(tmp_path / "seen")
+    handled: list[int] = []
+
+    def make_bot() -> Bot:
+        dedup = UpdateDedup(backend=FileDedupBackend(path))
+        bot = Bot("token", dedup=dedup, at_least_once=True)
+
+        @bot.command(r"/(slow|fast)")
+        async def handle(chat: Chat, match: re.Match[str]) -> None:
+            handled.append(chat.message["message_id"])
+            if match.group(1) == "slow":
+                await asyncio.Event().wait()
+
+        return bot
+
+    async def crash() -> None:
+        bot = make_bot()
+        bot._process_update(update(5))
+        bot._process_update(update(6))
+        await asyncio.sleep(0.01)
+        # The process dies with the handler of update 5 still running
+        bot.scheduler.cancel()
+        await asyncio.sleep(0)
+        assert bot._poll_offset() == 4
+
+    async def restart() -> Bot:
+        bot = make_bot()
+        bot._process_update(update(5))
+        bot._process_update(update(6))
+        await asyncio.sleep(0)
+        bot.scheduler.cancel()
+        return bot
+
+    asyncio.run(crash())
+    bot = asyncio.run(restart())
+    # Update 5 is handled again, 6 was done and is dropped
+    assert handled == [5, 6, 5]
+    assert bot.dedup is not None and bot.dedup.hits == 1
@@ -0,0 +1,51 @@
+import asyncio
+from typing import Any, cast
+
+import aiohttp
+import pytest
+
+from aiotg.bot import Bot, BotApiError
+from aiotg.retry import RetryPolicy
+
+from conftest import FakeResponse
+
+
+class PollingBot(Bot):
+    def __init__(self, *results: Any) -> None:
+        super().__init__("test_token")
+        self.results = list(results)
+        self.polling_retry_policy = RetryPolicy(max_attempts=0, base_delay=0.001)
+
+    def api_call(self, method: str, **params: Any) -> Any:
+        result = self.results.pop(0)
+        if not self.results:
+            self.stop()
+        future: asyncio.Future[Any] = asyncio.Future()
+        if isinstance(result, Exception):
+            future.set_exception(result)
+        else:
+            future.set_result(result)
+        return future
+
+
+def test_polling_survives_network_errors() -> None:
+    bot = PollingBot(
+        aiohttp.ClientConnectionError(),
+        asyncio.TimeoutError(),
+        {"ok": True, "result": []},
+    )
+    states: list[bool] = []
+    bot.on_connectivity(lambda online, error: states.append(online))
+
+    asyncio.run(bot.loop())
+    assert states == [False, True]
+
+
+def test_polling_fatal_errors() -> None:
+    unauthorized = BotApiError(
+        "Unauthorized", response=cast(Any, FakeResponse(401, {}))
+    )
+    bot = PollingBot(unauthorized, {"ok": True, "result": []})
+
+    with pytest.raises(BotApiError):
+        asyncio.run(bot.loop())
@@ -0,0 +1,58 @@
+import asyncio
+from typing import cast
+
+import aiohttp
+
+from aiotg.bot import Bot
+from aiotg.pools import API_POOL, FILE_POOL, POLL_POOL, ConnectionPools
+
+from conftest import FakeSession
+
+
+def make_bot(pools: ConnectionPools | None) -> tuple[Bot, dict[str, FakeSession]]:
+    bot = Bot("test_token", pools=pools)
+    sessions = {pool: FakeSession() for pool in (API_POOL, POLL_POOL, FILE_POOL)}
+    bot._session = cast(aiohttp.ClientSession, sessions[API_POOL])
+    if pools is not None:
+        bot._pool_sessions = {
+            pool: cast(aiohttp.ClientSession, sessions[pool])
+            for pool in (POLL_POOL, FILE_POOL)
+        }
+    return bot, sessions
+
+
+def test_connector_limits() -> None:
+    async def main() -> None:
+        pools = ConnectionPools(api_limit=10, file_limit=3)
+        connector = pools.connector(FILE_POOL)
+        assert connector.limit == 3
+        assert connector.limit_per_host == 3
+        await connector.close()
+
+    asyncio.run(main())
+
+
+def test_pool_routing() -> None:
+    bot, sessions = make_bot(ConnectionPools())
+
+    async def main() -> None:
+        await bot._api_call("getUpdates", timeout=0)
+        await bot._api_call("sendMessage", chat_id=1, text="hi")
+
+    asyncio.run(main())
+    assert sessions[POLL_POOL].methods == ["getUpdates"]
+    assert sessions[API_POOL].methods == ["sendMessage"]
+
+
+def test_shared_session_without_pools() -> None:
+    bot, sessions = make_bot(None)
+    asyncio.run(bot._api_call("getUpdates", timeout=0))
+    assert sessions[API_POOL].methods == ["getUpdates"]
+    assert not sessions[POLL_POOL].methods
+
+
+def test_warm_up() -> None:
+    bot, sessions = make_bot(ConnectionPools())
+    asyncio.run(bot.warm_up(2))
+    for session in sessions.values():
+        assert session.methods == ["HEAD", "HEAD"]
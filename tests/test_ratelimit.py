@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+from aiotg.ratelimit import RateLimiter, TokenBucket, method_class
+
+
+@pytest.mark.parametrize(
+    "method,cls",
+    [
+        ("sendMessage", "message"),
+        ("copyMessage", "message"),
+        ("sendChatAction", "action"),
+        ("editMessageText", "edit"),
+        ("answerCallbackQuery", "answer"),
+        ("getUpdates", "other"),
+    ],
+)
+def test_method_class(method: str, cls: str) -> None:
+    assert method_class(method) == cls
+
+
+def test_token_bucket() -> None:
+    bucket = TokenBucket(2, 1.0, burst=2)
+    assert bucket.reserve(0.0) == 0.0
+    assert bucket.reserve(0.0) == 0.0
+    assert bucket.reserve(0.0) == 0.5
+    assert bucket.reserve(0.0) == 1.0
+    assert not bucket.idle(1.5)
+    assert bucket.idle(2.0)
+
+
+def test_chat_pacing() -> None:
+    limiter = RateLimiter(
+        global_limit=(1000, 1.0, 1),
+        private_limit=(1, 0.05, 1),
+        group_limit=(1, 0.05, 1),
+    )
+    sent: dict[str, list[float]] = {"1": [], "-2": []}
+
+    async def send(chat_id: str) -> None:
+        await limiter.acquire("sendMessage", chat_id)
+        sent[chat_id].append(asyncio.get_running_loop().time())
+
+    async def main() -> None:
+        tasks = [asyncio.ensure_future(send(c)) for c in ["1", "1", "1", "-2"]]
+        await asyncio.sleep(0)
+        assert limiter.depth(1) == 2
+        assert limiter.stats()["chats"] == 2
+        assert limiter.queued >= 2
+        await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+    private = sent["1"]
+    assert all(b - a >= 0.045 for a, b in zip(private, private[1:]))
+    # The group chat is not stuck behind the private one
+    assert sent["-2"][0] < private[1]
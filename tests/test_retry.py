@@ -0,0 +1,83 @@
+import asyncio
+from typing import Any, cast
+
+import aiohttp
+import pytest
+
+from aiotg.bot import Bot, BotApiError
+from aiotg.retry import RetryPolicy
+
+from conftest import FakeResponse, FakeSession, error_response, ok_response
+
+
+def make_bot(policy: RetryPolicy, *responses: FakeResponse | Exception) -> Bot:
+    bot = Bot("test_token", retry_policy=policy)
+    bot._session = cast(aiohttp.ClientSession, FakeSession(*responses))
+    return bot
+
+
+def test_next_delay() -> None:
+    policy = RetryPolicy(max_attempts=3, base_delay=1.0, max_delay=3.0)
+    assert 0.5 <= policy.next_delay(1, 0.0) <= 1.0  # type: ignore
+    assert 1.0 <= policy.next_delay(2, 0.0) <= 2.0  # type: ignore
+    assert policy.next_delay(3, 0.0) is None
+    assert policy.next_delay(1, 0.0, retry_after=7) == 7.0
+
+    policy = RetryPolicy(max_attempts=0, deadline=5.0)
+    assert policy.next_delay(100, 0.0, retry_after=4) == 4.0
+    assert policy.next_delay(100, 2.0, retry_after=4) is None
+
+
+def test_retry_after() -> None:
+    too_many = error_response(429, "Slow down", retry_after=0)
+    ok = ok_response()
+    bot = make_bot(RetryPolicy(base_delay=60), too_many, ok)
+
+    assert asyncio.run(bot._api_call("sendMessage")) == {"ok": True, "result": True}
+    assert cast(FakeSession, bot.session).calls == 2
+
+
+def test_network_errors() -> None:
+    ok = ok_response()
+    bot = make_bot(RetryPolicy(base_delay=0.001), aiohttp.ServerDisconnectedError(), ok)
+    assert asyncio.run(bot._api_call("getMe"))["ok"]
+
+    bot = make_bot(
+        RetryPolicy(network_errors=False), aiohttp.ServerDisconnectedError(), ok
+    )
+    with pytest.raises(aiohttp.ServerDisconnectedError):
+        asyncio.run(bot._api_call("getMe"))
+
+
+def test_timeouts_of_sends() -> None:
+    ok = ok_response()
+    policy = RetryPolicy(base_delay=0.001)
+    # Telegram might have got the message, it could be sent twice
+    bot = make_bot(policy, asyncio.TimeoutError(), ok)
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(bot._api_call("sendMessage"))
+
+    # The connection never got through, nothing was sent
+    refused = aiohttp.ClientConnectorError(cast(Any, None), ConnectionRefusedError())
+    bot = make_bot(policy, refused, ok)
+    assert asyncio.run(bot._api_call("sendMessage"))["ok"]
+
+    policy = RetryPolicy(base_delay=0.001, retry_timeouts=True)
+    bot = make_bot(policy, asyncio.TimeoutError(), ok)
+    assert asyncio.run(bot._api_call("sendMessage"))["ok"]
+
+
+def test_give_up() -> None:
+    error = error_response(502, "Bad Gateway")
+    bot = make_bot(RetryPolicy(max_attempts=2, base_delay=0.001), error, error)
+    with pytest.raises(BotApiError):
+        asyncio.run(bot._api_call("getMe"))
+    assert cast(FakeSession, bot.session).calls == 2
+
+
+def test_per_method_policy() -> None:
+    error = error_response(502, "Bad Gateway")
+    bot = make_bot(RetryPolicy(base_delay=60), error)
+    bot.retry_policies["sendMessage"] = RetryPolicy(max_attempts=1)
+    with pytest.raises(BotApiError):
+        asyncio.run(bot._api_call("sendMessage"))
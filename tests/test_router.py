@@ -0,0 +1,121 @@
+import re
+
+import pytest
+
+from aiotg.router import CommandRouter, Router, command_key, literal_prefix
+
+
+@pytest.mark.parametrize(
+    "pattern,key",
+    [
+        (r"^/start$", "/start"),
+        (r"^/Echo (.+)", "/echo"),
+        (r"^/ban\s+(\d+)", "/ban"),
+        (r"/echo (.+)", None),
+        (r"^/help", None),
+        (r"^/stats?$", None),
+        (r"^/a|/b", None),
+    ],
+)
+def test_command_key(pattern: str, key: str | None) -> None:
+    assert command_key(pattern) == key
+
+
+@pytest.mark.parametrize(
+    "pattern,prefix",
+    [
+        (r"^vote:(\d+):(up|down)", "vote:"),
+        (r"^Item\.", "item."),
+        (r"^votes?", "vote"),
+        (r"\Aab\d", "ab"),
+        (r"vote:(\d+)", None),
+        (r"^[v]ote", None),
+        (r"^a|b", None),
+    ],
+)
+def test_literal_prefix(pattern: str, prefix: str | None) -> None:
+    assert literal_prefix(pattern) == prefix
+
+
+def test_first_registered_wins() -> None:
+    router = CommandRouter()
+    router.add(r"foo", "first")
+    router.add(r"^/start$", "indexed")
+    router.add(r"bar", "second")
+
+    found = router.match("bar foo")
+    assert found and found[0] == "first"
+
+    found = router.match("/start")
+    assert found and found[0] == "indexed"
+
+    found = router.match("bar")
+    assert found and found[0] == "second"
+
+    assert router.match("nothing") is None
+
+
+def test_botname_suffix() -> None:
+    router = CommandRouter()
+    router.add(r"^/echo (.+)", "echo")
+
+    found = router.match("/ECHO@my_bot foo")
+    assert found is None
+
+    found = router.match("/echo foo")
+    assert found and found[1].group(1) == "foo"
+
+
+def test_matches_plain_search() -> None:
+    patterns = [r"/echo (.+)", r"^/start\s", r"(\w)\1", r"^/vote (up|down)", r"baz$"]
+    texts = ["/echo hi", "/start now", "aa /start x", "/vote up", "/Vote Down", "baz"]
+
+    router = CommandRouter()
+    for i, pattern in enumerate(patterns):
+        router.add(pattern, i)
+
+    for text in texts:
+        expected = next(
+            (
+                (i, m.groups())
+                for i, p in enumerate(patterns)
+                if (m := re.search(p, text, re.I))
+            ),
+            None,
+        )
+        found = router.match(text)
+        assert (found and (found[0], found[1].groups())) == expected
+
+
+def test_prefix_router() -> None:
+    router = Router()
+    router.add(r"^vote:(\d+):(up|down)", "vote")
+    router.add(r"^votes", "votes")
+    router.add(r":(\d+)$", "tail")
+
+    found = router.match("VOTE:12:up")
+    assert found and found[0] == "vote" and found[1].groups() == ("12", "up")
+
+    found = router.match("vote:1")
+    assert found and found[0] == "tail"
+
+    found = router.match("votes")
+    assert found and found[0] == "votes"
+
+    assert router.match("other") is None
+
+
+def test_router_stats() -> None:
+    router = Router()
+    router.add(r"^a", "a")
+    router.add(r"^b", "b")
+
+    router.match("a")
+    router.match("a")
+    router.match("c")
+
+    assert router.stats() == {
+        "lookups": 3,
+        "misses": 1,
+        "hits": [("^a", 2), ("^b", 0)],
+    }
@@ -0,0 +1,111 @@
+import asyncio
+import re
+from typing import Any, cast
+
+import aiohttp
+
+from aiotg import Bot, Chat
+from aiotg.pools import POLL_POOL
+from aiotg.runner import PollingRunner
+
+from conftest import (
+    FakeResponse,
+    FakeSession,
+    error_response,
+    message_update,
+    ok_response,
+)
+
+
+class PollSession(FakeSession):
+    def __init__(
+        self,
+        connector: aiohttp.BaseConnector | None,
+        connector_owner: bool,
+        *polls: FakeResponse,
+    ) -> None:
+        super().__init__()
+        self.connector = connector
+        self.connector_owner = connector_owner
+        self.polls = list(polls)
+
+    async def respond(
+        self, method: str, params: dict[str, Any]
+    ) -> FakeResponse | Exception:
+        if method != "getUpdates":
+            return await super().respond(method, params)
+        if not self.polls:
+            # Long poll with nothing to report
+            await asyncio.sleep(3600)
+        return self.polls.pop(0)
+
+
+def make_bot(token: str, *polls: FakeResponse) -> Bot:
+    bot = Bot(token)
+
+    def new_session(
+        connector: aiohttp.BaseConnector | None, connector_owner: bool = True
+    ) -> aiohttp.ClientSession:
+        session = PollSession(connector, connector_owner, *polls)
+        return cast(aiohttp.ClientSession, session)
+
+    bot._new_session = new_session  # type: ignore[method-assign]
+
+    @bot.command(r"/start")
+    async def start(chat: Chat, match: re.Match[str]) -> None:
+        await chat.send_text("hi from " + token)
+
+    return bot
+
+
+def test_shared_connectors() -> None:
+    ok = ok_response([message_update("/start")])
+    bots = [make_bot(f"{i}:token", ok) for i in range(3)]
+    runner = PollingRunner(bots, connections=4, stagger=0)
+    assert runner.poll_limit == 3
+    assert PollingRunner(bots, pipeline=True).poll_limit == 6
+
+    async def main() -> list[PollSession]:
+        await runner.start()
+        connector, poll_connector = runner.connector, runner.poll_connector
+        assert connector is not None and connector.limit == 4
+        assert poll_connector is not None and poll_connector.limit == 3
+        await asyncio.sleep(0.05)
+
+        sessions = []
+        for bot in bots:
+            session = cast(PollSession, bot.session)
+            polls = cast(PollSession, bot._pool_sessions[POLL_POOL])
+            # Long polls and API calls don't compete for connections
+            assert session.connector is connector and not session.connector_owner
+            assert polls.connector is poll_connector and not polls.connector_owner
+            assert polls.methods == ["getUpdates", "getUpdates"]
+            assert session.methods == ["sendMessage"]
+            sessions += [session, polls]
+        await runner.stop()
+        assert connector.closed and poll_connector.closed
+        return sessions
+
+    sessions = asyncio.run(main())
+    texts = [call["text"] for s in sessions for call in s.sent if "text" in call]
+    assert texts == [f"hi from {i}:token" for i in range(3)]
+    assert all(s.closed for s in sessions)
+
+
+def test_fatal_error_stops_one_bot() -> None:
+    unauthorized = error_response(401, "Unauthorized")
+    ok = ok_response([message_update("/start")])
+    broken, working = make_bot("1:revoked", unauthorized), make_bot("2:token", ok)
+    runner = PollingRunner([broken, working], stagger=0)
+
+    async def main() -> None:
+        await runner.start()
+        await asyncio.sleep(0.05)
+        assert runner._tasks[0].done() and not runner._tasks[1].done()
+        await runner.stop()
+
+    asyncio.run(main())
+    session = cast(PollSession, working._session)
+    assert [call["text"] for call in session.sent if "text" in call] == [
+        "hi from 2:token"
+    ]
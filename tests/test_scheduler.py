@@ -0,0 +1,163 @@
+import asyncio
+import re
+from typing import Any, cast
+
+import aiohttp
+
+from aiotg import Bot, Chat
+from aiotg.bot import ApiCall
+from aiotg.scheduler import UpdateScheduler
+
+from conftest import FakeResponse, FakeSession, message_update
+
+
+class SlowSession(FakeSession):
+    """Answers after a delay, keeping track of requests in flight"""
+
+    def __init__(self, delay: float = 0.01) -> None:
+        super().__init__()
+        self.delay = delay
+        self.running = 0
+        self.peak = 0
+
+    async def respond(
+        self, method: str, params: dict[str, Any]
+    ) -> FakeResponse | Exception:
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        await asyncio.sleep(self.delay)
+        self.running -= 1
+        return await super().respond(method, params)
+
+
+def test_max_tasks() -> None:
+    running = 0
+    peak = 0
+
+    async def handler() -> None:
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+
+    async def main() -> None:
+        scheduler = UpdateScheduler(max_tasks=2)
+        for _ in range(5):
+            scheduler.submit(handler())
+        assert scheduler.in_flight == 2
+        assert scheduler.queued == 3
+        await scheduler.join()
+        assert scheduler.in_flight == 0
+
+    asyncio.run(main())
+    assert peak == 2
+
+
+def test_returned_reply_takes_the_slot() -> None:
+    scheduler = UpdateScheduler(max_tasks=1)
+    bot = Bot("token", scheduler=scheduler)
+    session = SlowSession()
+    bot._session = cast(aiohttp.ClientSession, session)
+
+    @bot.command(r"/start")
+    def start(chat: Chat, match: re.Match[str]) -> ApiCall:
+        return chat.reply("hi")
+
+    async def main() -> None:
+        for update_id in range(10):
+            bot._process_update(message_update("/start", update_id))
+        await asyncio.sleep(0)
+        assert scheduler.in_flight == 1 and scheduler.queued == 9
+        assert session.running == 1
+        await scheduler.join()
+
+    asyncio.run(main())
+    assert session.peak == 1 and session.calls == 10
+
+
+def test_wait_for_room() -> None:
+    release = asyncio.Event()
+
+    async def handler() -> None:
+        await release.wait()
+
+    async def main() -> None:
+        scheduler = UpdateScheduler(max_tasks=1, max_queue=2)
+        for _ in range(3):
+            scheduler.submit(handler())
+        assert scheduler.full()
+
+        waiter = asyncio.ensure_future(scheduler.wait_for_room())
+        await asyncio.sleep(0)
+        assert not waiter.done()
+
+        release.set()
+        await asyncio.wait_for(waiter, 1)
+        assert not scheduler.full()
+        await scheduler.join()
+
+    asyncio.run(main())
+
+
+def test_handler_errors_are_logged(caplog) -> None:
+    async def handler() -> None:
+        raise ValueError("boom")
+
+    async def main() -> None:
+        scheduler = UpdateScheduler()
+        scheduler.submit(handler())
+        await scheduler.join()
+
+    asyncio.run(main())
+    assert "Update handler failed" in caplog.text
+
+
+def test_ordered_lanes() -> None:
+    log: list[tuple[int, int]] = []
+
+    async def handler(chat_id: int, n: int, delay: float) -> None:
+        await asyncio.sleep(delay)
+        log.append((chat_id, n))
+
+    async def main() -> None:
+        scheduler = UpdateScheduler(ordered=True)
+        scheduler.submit(handler(1, 0, 0.02), lane=1)
+        scheduler.submit(handler(1, 1, 0), lane=1)
+        scheduler.submit(handler(2, 0, 0), lane=2)
+        assert scheduler.lanes == 2
+        await scheduler.join()
+        assert scheduler.lanes == 0
+
+    asyncio.run(main())
+    # Chat 2 is not blocked by chat 1, chat 1 keeps its order
+    assert log == [(2, 0), (1, 0), (1, 1)]
+
+
+def test_returned_replies_keep_lane_order() -> None:
+    bot = Bot("token", scheduler=UpdateScheduler(ordered=True))
+    delays = {"/first": 0.02, "/second": 0}
+    replied: list[str] = []
+
+    class Session(FakeSession):
+        async def respond(
+            self, method: str, params: dict[str, Any]
+        ) -> FakeResponse | Exception:
+            await asyncio.sleep(delays[params["text"]])
+            replied.append(params["text"])
+            return await super().respond(method, params)
+
+    bot._session = cast(aiohttp.ClientSession, Session())
+
+    @bot.command(r"/(first|second)")
+    def echo(chat: Chat, match: re.Match[str]) -> ApiCall:
+        return chat.send_text(match.group(0))
+
+    async def main() -> None:
+        bot._process_update(message_update("/first", 1))
+        bot._process_update(message_update("/second", 2))
+        await bot.scheduler.join()
+
+    asyncio.run(main())
+    # The slow reply to the first message still goes out first
+    assert replied == ["/first", "/second"]
@@ -0,0 +1,89 @@
+import asyncio
+import json
+import re
+from typing import Any
+
+import pytest
+
+from aiotg import Chat
+from aiotg.mock import MockBot
+
+pytest.importorskip("msgspec")
+
+from aiotg.structs import StructCodec, TelegramStruct  # noqa: E402
+
+message = {
+    "message_id": 1,
+    "from": {"id": 123, "is_bot": False, "first_name": "John", "username": "john"},
+    "chat": {"id": 123, "type": "private"},
+    "date": 0,
+    "text": "/echo hi",
+    "entities": [{"type": "bot_command", "offset": 0, "length": 5}],
+}
+
+
+def test_dict_access() -> None:
+    codec = StructCodec()
+    update = codec.decode_update(json.dumps({"update_id": 7, "message": message}))
+    assert isinstance(update, TelegramStruct)
+
+    msg = update["message"]
+    assert list(update) == ["update_id", "message"]
+    assert msg["from"]["first_name"] == "John"
+    assert msg["entities"][0]["type"] == "bot_command"
+    assert "text" in msg and "photo" not in msg
+    assert msg.get("photo", []) == []
+    with pytest.raises(KeyError):
+        msg["photo"]
+    assert msg.to_dict() == message
+
+
+def test_updates_response() -> None:
+    codec = StructCodec()
+    body = {"ok": True, "result": [{"update_id": 1, "message": message}]}
+    updates = codec.decode_updates(json.dumps(body).encode())
+    assert updates["ok"]
+    assert updates["result"][0]["message"]["chat"]["id"] == 123
+
+
+def test_fallback_to_dicts() -> None:
+    codec = StructCodec()
+    # Not a chat type the definitions know about
+    odd = dict(message, chat={"id": 1, "type": "lounge"})
+    update = codec.decode_update(json.dumps({"update_id": 1, "message": odd}))
+    assert isinstance(update, dict)
+
+
+def test_unknown_fields_kept() -> None:
+    codec = StructCodec()
+    # A field added to the Bot API after the definitions were written
+    novel = dict(message, novel_field={"id": 1})
+    update = codec.decode_update(json.dumps({"update_id": 1, "message": novel}))
+    assert isinstance(update, dict)
+    assert update["message"]["novel_field"] == {"id": 1}
+
+    joined = dict(message, new_chat_member=message["from"])
+    update = codec.decode_update(json.dumps({"update_id": 1, "message": joined}))
+    assert isinstance(update, TelegramStruct)
+    assert update["message"]["new_chat_member"]["first_name"] == "John"
+
+
+def test_handlers_get_structs() -> None:
+    bot = MockBot(codec=StructCodec())
+    called_with: Any = None
+
+    @bot.command(r"/echo (.+)")
+    def echo(chat: Chat, match: re.Match[str]) -> None:
+        nonlocal called_with
+        called_with = match.group(1)
+        assert repr(chat.sender) == "John (john)"
+
+    async def main() -> None:
+        update = bot.codec.decode_update(
+            json.dumps({"update_id": 1, "message": message})
+        )
+        bot._process_update(update)
+        await bot.scheduler.join()
+
+    asyncio.run(main())
+    assert called_with == "hi"
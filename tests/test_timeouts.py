@@ -0,0 +1,49 @@
+import asyncio
+from typing import cast
+
+import aiohttp
+import pytest
+
+from aiotg.bot import API_CALL_TIMEOUT, WATCHDOG_GRACE, Bot, BotApiError
+from aiotg.ratelimit import RateLimiter
+from aiotg.retry import RetryPolicy
+
+from conftest import FakeResponse, FakeSession, error_response, ok_response
+
+
+def make_bot(policy: RetryPolicy, *responses: FakeResponse | Exception) -> Bot:
+    bot = Bot("test_token", retry_policy=policy)
+    bot._session = cast(aiohttp.ClientSession, FakeSession(*responses))
+    return bot
+
+
+def test_client_timeouts() -> None:
+    ok = ok_response([])
+    bot = make_bot(RetryPolicy(), ok, ok)
+    session = cast(FakeSession, bot.session)
+
+    asyncio.run(bot._api_call("getUpdates", timeout=60))
+    asyncio.run(bot._api_call("sendMessage"))
+    assert session.timeouts[0].total == 60 + WATCHDOG_GRACE
+    assert session.timeouts[1].total == API_CALL_TIMEOUT
+
+
+def test_deadline() -> None:
+    error = error_response(502, "Bad Gateway")
+    bot = make_bot(RetryPolicy(base_delay=60), error)
+    # The backoff doesn't fit the deadline, the error is raised right away
+    with pytest.raises(BotApiError):
+        asyncio.run(bot._api_call("getMe", deadline=1.0))
+
+    ok = ok_response()
+    bot = make_bot(RetryPolicy(), ok, ok)
+    bot.rate_limiter = RateLimiter(private_limit=(1, 60.0, 1))
+
+    async def main() -> None:
+        await bot._api_call("sendMessage", chat_id=1)
+        # Stuck behind the per-chat limit
+        await bot._api_call("sendMessage", deadline=0.01, chat_id=1)
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(main())
+    assert cast(FakeSession, bot.session).calls == 1
@@ -1,14 +1,20 @@
 import asyncio
+import json
 import re
 from threading import Event, Thread
+from typing import cast
 from urllib.parse import urlparse
 
+import aiohttp
 import pytest
 from aiohttp import web
 
 from aiotg.bot import Bot
 from aiotg.chat import Chat
 from aiotg.mock import MockBot
+from aiotg.scheduler import UpdateScheduler
+
+from conftest import FakeRequest, FakeSession, message_update
 
 # ⚠️  beware, this test is a total hack ⚠️
 
@@ -70,3 +76,84 @@ def test_delete_webhook() -> None:
     bot = MockBot()
     bot.delete_webhook()
     assert "deleteWebhook" in bot.calls
+
+
+def test_reply_in_response() -> None:
+    bot = Bot("test_token", webhook_reply_timeout=0.5)
+    bot._webhook_uuid = "secret"
+    session = FakeSession()
+    bot._session = cast(aiohttp.ClientSession, session)
+
+    @bot.command(r"/echo (.+)")
+    async def echo(chat: Chat, match: re.Match[str]) -> None:
+        await asyncio.sleep(0.01)
+        assert await chat.send_text(match.group(1)) is None
+        # Only the first call goes into the response
+        await chat.send_text("bye")
+
+    async def main() -> web.Response:
+        request = cast(web.Request, FakeRequest(message_update("/echo foo"), "secret"))
+        response = await bot.webhook_handle(request)
+        await bot.scheduler.join()
+        return response
+
+    response = asyncio.run(main())
+    assert response.content_type == "application/json"
+    assert json.loads(cast(bytes, response.body)) == {
+        "method": "sendMessage",
+        "chat_id": 1,
+        "text": "foo",
+    }
+    assert [call["text"] for call in session.sent] == ["bye"]
+
+
+def test_reply_from_queued_handler() -> None:
+    # The second handler waits in the chat lane and still replies in its
+    # own response, not the one of the handler that was running before it
+    bot = Bot(
+        "test_token",
+        webhook_reply_timeout=1,
+        scheduler=UpdateScheduler(ordered=True),
+    )
+    bot._webhook_uuid = "secret"
+    session = FakeSession()
+    bot._session = cast(aiohttp.ClientSession, session)
+
+    @bot.command(r"/echo (.+)")
+    async def echo(chat: Chat, match: re.Match[str]) -> None:
+        await asyncio.sleep(0.01)
+        await chat.send_text(match.group(1))
+
+    async def main() -> list[web.Response]:
+        requests = [
+            cast(web.Request, FakeRequest(message_update("/echo " + text), "secret"))
+            for text in ("one", "two")
+        ]
+        responses = await asyncio.gather(*map(bot.webhook_handle, requests))
+        await bot.scheduler.join()
+        return responses
+
+    responses = asyncio.run(main())
+    texts = [json.loads(cast(bytes, r.body))["text"] for r in responses]
+    assert texts == ["one", "two"]
+    assert not session.sent
+
+
+def test_reply_in_response_timeout() -> None:
+    bot = MockBot(webhook_reply_timeout=0.01)
+    bot._webhook_uuid = "secret"
+
+    @bot.command(r"/slow")
+    async def slow(chat: Chat, match: re.Match[str]) -> None:
+        await asyncio.sleep(0.05)
+        chat.send_text("late")
+
+    async def main() -> web.Response:
+        request = cast(web.Request, FakeRequest(message_update("/slow"), "secret"))
+        response = await bot.webhook_handle(request)
+        await bot.scheduler.join()
+        return response
+
+    response = asyncio.run(main())
+    assert response.body is None
+    assert bot.calls["sendMessage"]["text"] == "late"